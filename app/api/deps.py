@@ -1,13 +1,15 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
-from app.db.session import SessionLocal
+from app.db.session import ReadSessionLocal, SessionLocal, replica_health
+from app.core.read_routing import pinned_to_primary
 from app.db.models.user import User
 from app.core.security import decode_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+optional_oauth2 = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
 # Dependencia de DB para inyectar en los endpoints
 def get_db():
@@ -17,6 +19,30 @@ def get_db():
     finally:
         db.close()
 
+# Dependencia para endpoints de solo lectura: usa la réplica si existe, está sana y
+# el cliente no escribió hace poco (read-your-writes); si no, el primario.
+def get_read_db(request: Request):
+    use_replica = (
+        ReadSessionLocal is not None
+        and not pinned_to_primary(request.cookies, request.headers)
+        and replica_health.ok()
+    )
+    db = None
+    if use_replica:
+        db = ReadSessionLocal()
+        try:
+            db.connection()  # falla aquí (y no a mitad del endpoint) si la réplica cayó
+        except Exception:
+            db.close()
+            replica_health.mark_down()
+            db = None
+    if db is None:
+        db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
     credentials_exc = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,6 +62,17 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         raise credentials_exc
     return user
 
+# Anota en la sesión de escritura quién hace el cambio, para la auditoría. Solo lee el
+# token (sub + uid), sin consultar la DB y sin exigir login.
+def audit_actor(token: str | None = Depends(optional_oauth2), db: Session = Depends(get_db)) -> None:
+    if not token:
+        return
+    try:
+        payload = decode_token(token)
+    except Exception:
+        return
+    db.info["actor"] = (payload.get("uid"), payload.get("sub"))
+
 def get_current_active_admin(user: User = Depends(get_current_user)) -> User:
     if user.role != "ADMIN":
         raise HTTPException(status_code=403, detail="Requiere rol ADMIN")
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_active_admin, get_db
+from app.db.models.audit import AuditLog
+from app.schemas.audit import AuditPage
+
+router = APIRouter(prefix="/audit", tags=["audit"], dependencies=[Depends(get_current_active_admin)])
+
+@router.get("", response_model=AuditPage)
+def list_audit(
+    db: Session = Depends(get_db),  # la misma sesión que valida al admin: una sola conexión
+    entity: Optional[str] = Query(None),
+    entity_id: Optional[int] = Query(None),
+    user_id: Optional[int] = Query(None),
+    action: Optional[str] = Query(None),
+    from_ts: Optional[datetime] = Query(None),
+    to_ts: Optional[datetime] = Query(None),
+    before: Optional[int] = Query(None, description="Cursor: next_before de la página anterior"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Historial de cambios, del más reciente al más viejo (paginación keyset por id)."""
+    stmt = select(AuditLog)
+    if entity:
+        stmt = stmt.where(AuditLog.entity == entity)
+    if entity_id is not None:
+        stmt = stmt.where(AuditLog.entity_id == entity_id)
+    if user_id is not None:
+        stmt = stmt.where(AuditLog.user_id == user_id)
+    if action:
+        stmt = stmt.where(AuditLog.action == action)
+    if from_ts is not None:
+        stmt = stmt.where(AuditLog.ts >= from_ts)
+    if to_ts is not None:
+        stmt = stmt.where(AuditLog.ts <= to_ts)
+    if before is not None:
+        stmt = stmt.where(AuditLog.id < before)
+
+    rows = db.scalars(stmt.order_by(AuditLog.id.desc()).limit(limit + 1)).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return AuditPage(items=rows, next_before=rows[-1].id if more else None)
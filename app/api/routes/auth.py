@@ -37,7 +37,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     if not user or not verify_password(form_data.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
 
-    token = create_access_token({"sub": user.username})
+    token = create_access_token({"sub": user.username, "uid": user.id})
     return {"access_token": token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserOut)
@@ -2,13 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
-from app.api.deps import get_db
+from app.api.deps import audit_actor, get_db, get_read_db
 from app.db.models.brand import Brand
+from app.schemas.batch import BatchGetIn, BatchOut
 from app.schemas.brand import BrandCreate, BrandUpdate, BrandOut
+from app.utils.batch import fetch_by_ids
 
 router = APIRouter(prefix="/brands", tags=["brands"])
 
-@router.post("", response_model=BrandOut)
+@router.post("", response_model=BrandOut, dependencies=[Depends(audit_actor)])
 def create_brand(data: BrandCreate, db: Session = Depends(get_db)):
     exists = db.scalar(select(Brand).where(Brand.nombre == data.nombre))
     if exists:
@@ -20,17 +22,22 @@ def create_brand(data: BrandCreate, db: Session = Depends(get_db)):
     return brand
 
 @router.get("", response_model=list[BrandOut])
-def list_brands(db: Session = Depends(get_db)):
+def list_brands(db: Session = Depends(get_read_db)):
     return db.scalars(select(Brand).order_by(Brand.nombre)).all()
 
+@router.post("/batch-get", response_model=BatchOut[BrandOut])
+def batch_get_brands(data: BatchGetIn, db: Session = Depends(get_read_db)):
+    items, missing = fetch_by_ids(db, select(Brand), Brand.id, data.ids)
+    return BatchOut[BrandOut](items=items, missing=missing)
+
 @router.get("/{brand_id}", response_model=BrandOut)
-def get_brand(brand_id: int, db: Session = Depends(get_db)):
+def get_brand(brand_id: int, db: Session = Depends(get_read_db)):
     brand = db.get(Brand, brand_id)
     if not brand:
         raise HTTPException(status_code=404, detail="Marca no encontrada.")
     return brand
 
-@router.patch("/{brand_id}", response_model=BrandOut)
+@router.patch("/{brand_id}", response_model=BrandOut, dependencies=[Depends(audit_actor)])
 def update_brand(brand_id: int, data: BrandUpdate, db: Session = Depends(get_db)):
     brand = db.get(Brand, brand_id)
     if not brand:
@@ -47,7 +54,7 @@ def update_brand(brand_id: int, data: BrandUpdate, db: Session = Depends(get_db)
     db.refresh(brand)
     return brand
 
-@router.delete("/{brand_id}", status_code=204)
+@router.delete("/{brand_id}", status_code=204, dependencies=[Depends(audit_actor)])
 def delete_brand(brand_id: int, db: Session = Depends(get_db)):
     brand = db.get(Brand, brand_id)
     if not brand:
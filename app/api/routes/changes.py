@@ -0,0 +1,69 @@
+from collections import defaultdict
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from app.api.deps import get_db
+from app.api.routes.lots import _lot_to_out
+from app.db.models.brand import Brand
+from app.db.models.change import Change
+from app.db.models.lot import Lot
+from app.db.models.product import Product
+from app.db.models.sale import Sale
+from app.schemas.change import ChangesOut
+from app.services.changes import current_cursor
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+@router.get("", response_model=ChangesOut)
+def list_changes(
+    db: Session = Depends(get_db),  # primario: el cursor depende de las transacciones en curso
+    since: int = Query(0, ge=0, description="Cursor devuelto por la llamada anterior (0 = todo)"),
+    limit: int = Query(1000, ge=1, le=5000),
+):
+    """
+    Filas creadas, modificadas o borradas desde `since`. Solo se entregan cambios de
+    transacciones por debajo del xmin del snapshot, así ningún cambio con un cursor
+    menor puede aparecer más tarde.
+    """
+    upto = current_cursor(db)
+    rows = db.scalars(
+        select(Change)
+        .where(Change.seq >= since, Change.seq < upto)
+        .order_by(Change.seq)
+        .limit(limit + 1)
+    ).all()
+
+    has_more = len(rows) > limit
+    cursor = upto
+    if has_more:
+        # no partir una transacción entre páginas
+        boundary = rows[limit].seq
+        if boundary == rows[0].seq:
+            rows = db.scalars(select(Change).where(Change.seq == boundary)).all()
+            cursor = boundary + 1
+        else:
+            rows = [r for r in rows if r.seq != boundary]
+            cursor = boundary
+
+    upserts: dict[str, list[int]] = defaultdict(list)
+    deleted: dict[str, list[int]] = defaultdict(list)
+    for r in rows:
+        (deleted if r.op == "delete" else upserts)[r.entity].append(r.entity_id)
+
+    out = ChangesOut(cursor=cursor, has_more=has_more, deleted=dict(deleted))
+    if upserts["product"]:
+        out.products = db.scalars(select(Product).where(Product.id.in_(upserts["product"]))).all()
+    if upserts["brand"]:
+        out.brands = db.scalars(select(Brand).where(Brand.id.in_(upserts["brand"]))).all()
+    if upserts["lot"]:
+        lots = db.scalars(
+            select(Lot).options(selectinload(Lot.items)).where(Lot.id.in_(upserts["lot"]))
+        ).all()
+        out.lots = [_lot_to_out(l) for l in lots]
+    if upserts["sale"]:
+        out.sales = db.scalars(
+            select(Sale).options(selectinload(Sale.items)).where(Sale.id.in_(upserts["sale"]))
+        ).all()
+    return out
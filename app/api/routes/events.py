@@ -0,0 +1,42 @@
+import asyncio
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.services.events import broker
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+@router.get("/stream")
+async def stream_events(request: Request):
+    """
+    Server-sent events con cambios de stock/catálogo y ventas nuevas.
+    Tipos: product, product_deleted, sale, resync (el cliente debe recargar).
+    """
+    sub = broker.subscribe()
+
+    async def gen():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(sub.queue.get(), timeout=settings.EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                if sub.overflowed:
+                    # el cliente se atrasó y se perdieron eventos
+                    sub.overflowed = False
+                    yield 'data: {"t":"resync"}\n\n'
+                yield f"data: {payload}\n\n"
+        finally:
+            broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        gen(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,49 @@
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.api.deps import audit_actor, get_db, get_read_db
+from app.db.models.fx import ExchangeRate
+from app.schemas.fx import ExchangeRateIn, ExchangeRateOut
+from app.services.audit import record_audit
+from app.services.fx import rate_cache
+
+router = APIRouter(prefix="/fx", tags=["fx"])
+
+@router.put("/rates", response_model=list[ExchangeRateOut], dependencies=[Depends(audit_actor)])
+def upsert_rates(data: List[ExchangeRateIn], db: Session = Depends(get_db)):
+    """Carga/actualiza tipos de cambio (upsert por moneda+fecha) en una sola sentencia."""
+    if not data:
+        return []
+    rows = {(r.moneda, r.fecha): r.model_dump() for r in data}  # último gana si se repite
+    stmt = pg_insert(ExchangeRate).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_exchange_rates_moneda_fecha",
+        set_={"tasa_bob": stmt.excluded.tasa_bob},
+    ).returning(ExchangeRate)
+    out = db.scalars(stmt).all()
+    for r in out:
+        record_audit(db, "fx_rate", r.id, "upsert", {"moneda": r.moneda, "fecha": r.fecha, "tasa_bob": r.tasa_bob})
+    db.commit()
+    rate_cache.invalidate()
+    return out
+
+@router.get("/rates", response_model=list[ExchangeRateOut])
+def list_rates(
+    db: Session = Depends(get_read_db),
+    moneda: Optional[str] = Query(None, min_length=3, max_length=3),
+    from_date: Optional[date] = Query(None),
+    to_date: Optional[date] = Query(None),
+):
+    stmt = select(ExchangeRate)
+    if moneda:
+        stmt = stmt.where(ExchangeRate.moneda == moneda.upper())
+    if from_date is not None:
+        stmt = stmt.where(ExchangeRate.fecha >= from_date)
+    if to_date is not None:
+        stmt = stmt.where(ExchangeRate.fecha <= to_date)
+    return db.scalars(stmt.order_by(ExchangeRate.moneda, ExchangeRate.fecha)).all()
@@ -0,0 +1,65 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.db.models.job import Job
+from app.schemas.job import JobCreate, JobOut
+from app.services.jobs import FINISHED, cancel_job, enqueue_job
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+def accepted(response: Response, job: Job) -> Job:
+    """Respuesta estándar para operaciones largas: 202 + Location al estado del job."""
+    response.status_code = 202
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return job
+
+def _get_job(db: Session, job_id: int) -> Job:
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job no encontrado.")
+    return job
+
+@router.post("", response_model=JobOut, status_code=202)
+def create_job(data: JobCreate, response: Response, db: Session = Depends(get_db)):
+    try:
+        job = enqueue_job(db, data.kind, data.params, data.max_attempts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return accepted(response, job)
+
+@router.get("", response_model=list[JobOut])
+def list_jobs(
+    db: Session = Depends(get_db),
+    status: Optional[str] = Query(None),
+    kind: Optional[str] = Query(None),
+    limit: int = Query(default=50, ge=1, le=500),
+):
+    stmt = select(Job)
+    if status:
+        stmt = stmt.where(Job.status == status)
+    if kind:
+        stmt = stmt.where(Job.kind == kind)
+    return db.scalars(stmt.order_by(Job.id.desc()).limit(limit)).all()
+
+@router.get("/{job_id}", response_model=JobOut)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    return _get_job(db, job_id)
+
+@router.get("/{job_id}/result")
+def get_job_result(job_id: int, db: Session = Depends(get_db)):
+    job = _get_job(db, job_id)
+    if job.status != "succeeded":
+        code = 409 if job.status in FINISHED else 202
+        raise HTTPException(status_code=code, detail=f"Job en estado {job.status}.")
+    return job.result
+
+@router.post("/{job_id}/cancel", response_model=JobOut)
+def cancel(job_id: int, db: Session = Depends(get_db)):
+    job = _get_job(db, job_id)
+    if job.status in FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job ya terminado ({job.status}).")
+    return cancel_job(db, job)
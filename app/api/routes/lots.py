@@ -2,16 +2,24 @@ from decimal import Decimal
 from typing import Optional, List
 from datetime import date
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only, selectinload
 
-from app.api.deps import get_db
+from app.api.deps import audit_actor, get_db, get_read_db
 from app.db.models.lot import Lot, LotItem
 from app.db.models.product import Product
+from app.schemas.batch import BatchGetIn, BatchOut
 from app.schemas.lot import LotCreate, LotOut, LotItemCreate
+from app.services.events import notify, product_event
+from app.services.fx import FxRateMissing, get_rates
+from app.utils.batch import fetch_by_ids
+from app.utils.fields import column_attrs, dump_fields, parse_fields
 
 router = APIRouter(prefix="/lots", tags=["lots"])
 
+_ITEM_FIELDS = frozenset({"items", "total_cantidad", "total_bob"})
+
 def _lot_to_out(lot: Lot) -> LotOut:
     total_qty = sum(li.cantidad for li in lot.items)
     total_bob = sum(Decimal(li.subtotal_bob) for li in lot.items)
@@ -26,7 +34,47 @@ def _lot_to_out(lot: Lot) -> LotOut:
         total_bob=total_bob,
     )
 
-@router.post("", response_model=LotOut)
+def _add_items(db: Session, lot: Lot, items: List[LotItemCreate]) -> None:
+    """Agrega renglones al lote (convirtiendo a BOB si vienen en otra moneda) y suma stock."""
+    rates = get_rates(db) if any(it.costo_unitario_bob is None for it in items) else None
+    touched: dict[int, Product] = {}
+    for it in items:
+        if it.costo_unitario_bob is not None:
+            costo = Decimal(str(it.costo_unitario_bob))
+        else:
+            try:
+                costo = rates.convert(it.costo_unitario, lot.fecha, it.moneda, "BOB")
+            except FxRateMissing as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        sub = (costo * Decimal(it.cantidad)).quantize(Decimal("0.01"))
+        # moneda/costo original solo si el monto llegó en otra moneda (igual que en ventas)
+        foreign = it.costo_unitario is not None and it.moneda != "BOB"
+        db.add(LotItem(
+            lot_id=lot.id,
+            product_id=it.product_id,
+            cantidad=it.cantidad,
+            costo_unitario_bob=costo,
+            subtotal_bob=sub,
+            moneda=it.moneda if foreign else "BOB",
+            costo_unitario_orig=it.costo_unitario if foreign else None,
+        ))
+        # aumentar stock y (opcional) actualizar costo del producto
+        prod = db.get(Product, it.product_id)
+        prod.cantidad = (prod.cantidad or 0) + it.cantidad
+        prod.precio_compra = costo  # o mantener el anterior si prefieres
+        touched[prod.id] = prod
+    notify(db, [product_event(p) for p in touched.values()])
+
+def _lot_fields(lot: Lot, cols: frozenset[str]) -> dict:
+    """Como _lot_to_out pero solo con los campos pedidos (no toca columnas no cargadas)."""
+    out = {f: getattr(lot, f) for f in cols - {"total_cantidad", "total_bob"}}
+    if "total_cantidad" in cols:
+        out["total_cantidad"] = sum(li.cantidad for li in lot.items)
+    if "total_bob" in cols:
+        out["total_bob"] = sum(Decimal(li.subtotal_bob) for li in lot.items)
+    return out
+
+@router.post("", response_model=LotOut, dependencies=[Depends(audit_actor)])
 def create_lot(data: LotCreate, db: Session = Depends(get_db)):
     # validar productos
     ids = [it.product_id for it in data.items]
@@ -41,20 +89,7 @@ def create_lot(data: LotCreate, db: Session = Depends(get_db)):
     db.add(lot)
     db.flush()  # id
 
-    for it in data.items:
-        costo = Decimal(str(it.costo_unitario_bob))
-        sub = (costo * Decimal(it.cantidad)).quantize(Decimal("0.01"))
-        db.add(LotItem(
-            lot_id=lot.id,
-            product_id=it.product_id,
-            cantidad=it.cantidad,
-            costo_unitario_bob=costo,
-            subtotal_bob=sub,
-        ))
-        # aumentar stock y (opcional) actualizar costo del producto
-        prod = db.get(Product, it.product_id)
-        prod.cantidad = (prod.cantidad or 0) + it.cantidad
-        prod.precio_compra = costo  # o mantener el anterior si prefieres
+    _add_items(db, lot, data.items)
 
     db.commit()
     db.refresh(lot)
@@ -62,7 +97,7 @@ def create_lot(data: LotCreate, db: Session = Depends(get_db)):
     lot.items  # noqa
     return _lot_to_out(lot)
 
-@router.post("/{lot_id}/items", response_model=LotOut)
+@router.post("/{lot_id}/items", response_model=LotOut, dependencies=[Depends(audit_actor)])
 def add_items_to_lot(lot_id: int, items: List[LotItemCreate], db: Session = Depends(get_db)):
     lot = db.get(Lot, lot_id)
     if not lot:
@@ -77,19 +112,7 @@ def add_items_to_lot(lot_id: int, items: List[LotItemCreate], db: Session = Depe
     if missing:
         raise HTTPException(status_code=404, detail=f"Producto(s) inexistente(s): {missing}")
 
-    for it in items:
-        costo = Decimal(str(it.costo_unitario_bob))
-        sub = (costo * Decimal(it.cantidad)).quantize(Decimal("0.01"))
-        db.add(LotItem(
-            lot_id=lot.id,
-            product_id=it.product_id,
-            cantidad=it.cantidad,
-            costo_unitario_bob=costo,
-            subtotal_bob=sub,
-        ))
-        prod = db.get(Product, it.product_id)
-        prod.cantidad = (prod.cantidad or 0) + it.cantidad
-        prod.precio_compra = costo
+    _add_items(db, lot, items)
 
     db.commit()
     db.refresh(lot)
@@ -98,25 +121,38 @@ def add_items_to_lot(lot_id: int, items: List[LotItemCreate], db: Session = Depe
 
 @router.get("", response_model=list[LotOut])
 def list_lots(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
+    fields: Optional[str] = Query(None, description="Campos a devolver, ej. id,nombre,fecha,total_bob"),
 ):
+    cols = parse_fields(fields, LotOut)
     stmt = select(Lot)
     if from_date is not None:
         stmt = stmt.where(Lot.fecha >= from_date)
     if to_date is not None:
         stmt = stmt.where(Lot.fecha <= to_date)
     stmt = stmt.order_by(Lot.fecha.desc(), Lot.created_at.desc())
+    # los items (y los totales que salen de ellos) solo se cargan si se piden
+    if cols is None or cols & _ITEM_FIELDS:
+        stmt = stmt.options(selectinload(Lot.items))
+    if cols is not None:
+        stmt = stmt.options(load_only(*column_attrs(Lot, cols)))
 
     lots = db.scalars(stmt).all()
-    # cargar items
-    for l in lots:
-        _ = l.items
-    return [_lot_to_out(l) for l in lots]
+    if cols is None:
+        return [_lot_to_out(l) for l in lots]
+    if cols & _ITEM_FIELDS:
+        lots = [_lot_fields(l, cols) for l in lots]
+    return JSONResponse(dump_fields(LotOut, cols, lots))
+
+@router.post("/batch-get", response_model=BatchOut[LotOut])
+def batch_get_lots(data: BatchGetIn, db: Session = Depends(get_read_db)):
+    lots, missing = fetch_by_ids(db, select(Lot).options(selectinload(Lot.items)), Lot.id, data.ids)
+    return BatchOut[LotOut](items=[_lot_to_out(l) for l in lots], missing=missing)
 
 @router.get("/{lot_id}", response_model=LotOut)
-def get_lot(lot_id: int, db: Session = Depends(get_db)):
+def get_lot(lot_id: int, db: Session = Depends(get_read_db)):
     lot = db.get(Lot, lot_id)
     if not lot:
         raise HTTPException(status_code=404, detail="Lote no existe")
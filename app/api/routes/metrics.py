@@ -0,0 +1,26 @@
+import anyio.to_thread
+from fastapi import APIRouter
+
+from app.core import admission
+from app.db.session import engine, read_engine
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+def _pool_stats(eng) -> dict:
+    pool = eng.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+@router.get("/admission")
+async def admission_metrics():
+    """Estado del control de admisión, del threadpool y de los pools de conexiones."""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return {
+        "groups": admission.snapshot(),
+        "threadpool": {"total": limiter.total_tokens, "borrowed": limiter.borrowed_tokens},
+        "db_pool": _pool_stats(engine),
+        "db_read_pool": _pool_stats(read_engine) if read_engine is not None else None,
+    }
@@ -1,24 +1,38 @@
 import os
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
 from typing import Optional
 from decimal import Decimal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session, load_only
 
-from app.api.deps import get_db
+from app.api.deps import audit_actor, get_db, get_read_db
+from app.api.routes.jobs import accepted
 from app.core.config import settings
 from app.db.models.product import Product
 from app.db.models.brand import Brand
-from app.schemas.product import ProductCreate, ProductOut, ProductUpdate
+from app.db.models.product_stats import ProductSalesStats
+from app.schemas.product import (
+    ProductBulkResult, ProductBulkUpdate, ProductCreate, ProductOut, ProductUpdate, ReorderOut,
+)
+from app.schemas.batch import BatchGetIn, BatchOut
+from app.schemas.job import JobOut
+from app.services.audit import record_audit
+from app.services.changes import record_changes
+from app.services.events import notify, product_event
+from app.services.jobs import enqueue_job
+from app.services.sales import decay_velocity, reorder_figures
+from app.utils.batch import fetch_by_ids
+from app.utils.fields import column_attrs, dump_fields, parse_fields
 
 from app.db.models.lot import Lot, LotItem
 
 router = APIRouter(prefix="/products", tags=["products"])
 
-@router.post("", response_model=ProductOut)
+@router.post("", response_model=ProductOut, dependencies=[Depends(audit_actor)])
 def create_product(data: ProductCreate, db: Session = Depends(get_db)):
     """Crea un producto y registra su alta en un lote EXISTENTE (no se crean lotes nuevos)."""
     # 1) Validaciones de FK
@@ -58,6 +72,7 @@ def create_product(data: ProductCreate, db: Session = Depends(get_db)):
             subtotal_bob=subtotal,
         )
         db.add(lot_item)
+        notify(db, [product_event(product)])
 
         db.commit()
         db.refresh(product)
@@ -70,12 +85,16 @@ def create_product(data: ProductCreate, db: Session = Depends(get_db)):
 
 @router.get("", response_model=list[ProductOut])
 def list_products(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     search: Optional[str] = Query(None, description="Buscar por nombre"),
     brand_id: Optional[int] = Query(None),
     only_active: Optional[bool] = Query(None),
+    fields: Optional[str] = Query(None, description="Campos a devolver, ej. id,nombre,cantidad,precio_venta"),
 ):
+    cols = parse_fields(fields, ProductOut)
     stmt = select(Product)
+    if cols:
+        stmt = stmt.options(load_only(*column_attrs(Product, cols)))
     if search:
         stmt = stmt.where(Product.nombre.ilike(f"%{search}%"))
     if brand_id is not None:
@@ -85,16 +104,137 @@ def list_products(
     elif only_active is False:
         stmt = stmt.where(Product.activo.is_(False))
     stmt = stmt.order_by(Product.nombre.asc())
-    return db.scalars(stmt).all()
+    products = db.scalars(stmt).all()
+    if cols:
+        return JSONResponse(dump_fields(ProductOut, cols, products))
+    return products
+
+@router.get("/reorder", response_model=list[ReorderOut])
+def list_reorder(
+    db: Session = Depends(get_read_db),
+    brand_id: Optional[int] = Query(None),
+    only_needed: bool = Query(False, description="Solo productos bajo el punto de pedido"),
+    only_active: bool = Query(True),
+):
+    """Velocidad de venta, días de cobertura y pedido sugerido de todo el catálogo (una sola consulta)."""
+    stmt = (
+        select(
+            Product.id, Product.nombre, Product.brand_id, Product.cantidad,
+            ProductSalesStats.velocidad, ProductSalesStats.fecha_ref, ProductSalesStats.ultima_venta,
+        )
+        .outerjoin(ProductSalesStats, ProductSalesStats.product_id == Product.id)
+    )
+    if brand_id is not None:
+        stmt = stmt.where(Product.brand_id == brand_id)
+    if only_active:
+        stmt = stmt.where(Product.activo.is_(True))
+
+    hoy = date.today()
+    out: list[ReorderOut] = []
+    for pid, nombre, b_id, cantidad, velocidad, fecha_ref, ultima_venta in db.execute(stmt):
+        v = decay_velocity(velocidad, fecha_ref, hoy) if fecha_ref is not None else 0.0
+        dias, punto, sugerido = reorder_figures(cantidad, v)
+        if only_needed and sugerido <= 0:
+            continue
+        out.append(ReorderOut(
+            product_id=pid,
+            nombre=nombre,
+            brand_id=b_id,
+            cantidad=cantidad or 0,
+            velocidad_diaria=round(v, 4),
+            dias_cobertura=round(dias, 1) if dias is not None else None,
+            punto_pedido=round(punto, 2),
+            cantidad_sugerida=sugerido,
+            ultima_venta=ultima_venta,
+        ))
+    # primero lo que se agota antes; sin ventas al final
+    out.sort(key=lambda r: (r.dias_cobertura is None, r.dias_cobertura or 0.0))
+    return out
+
+@router.post("/reorder/rebuild", response_model=JobOut, status_code=202)
+def rebuild_reorder_stats(response: Response, db: Session = Depends(get_db)):
+    """Recalcula las estadísticas de venta desde el historial (carga inicial), en segundo plano."""
+    return accepted(response, enqueue_job(db, "rebuild_sales_stats"))
+
+@router.post("/bulk-update", response_model=ProductBulkResult, dependencies=[Depends(audit_actor)])
+def bulk_update_products(data: ProductBulkUpdate, db: Session = Depends(get_db)):
+    """
+    Actualización masiva en una sola transacción.
+    - items: cada {id, fields} se aplica con UPDATE por PK en lote (executemany).
+    - filter + operation: un único UPDATE ... WHERE sobre el conjunto filtrado.
+    """
+    try:
+        if data.items is not None:
+            rows: dict[int, dict] = {}
+            for it in data.items:
+                rows.setdefault(it.id, {}).update(it.fields.model_dump(exclude_unset=True))
+
+            found = set(db.scalars(select(Product.id).where(Product.id.in_(list(rows)))))
+            missing = [pid for pid in rows if pid not in found]
+
+            brand_ids = {r["brand_id"] for r in rows.values() if r.get("brand_id") is not None}
+            if brand_ids:
+                ok = set(db.scalars(select(Brand.id).where(Brand.id.in_(brand_ids))))
+                if brand_ids - ok:
+                    raise HTTPException(status_code=404, detail=f"Marca(s) no encontrada(s): {sorted(brand_ids - ok)}")
+
+            params = [{"id": pid, **fields} for pid, fields in rows.items() if pid in found and fields]
+            if params:
+                db.execute(update(Product), params)
+                record_changes(db, "product", [p["id"] for p in params])
+                record_audit(db, "product", None, "bulk_update", {"items": params})
+                notify(db, [{"t": "resync", "scope": "products"}])
+            db.commit()
+            return ProductBulkResult(affected=len(params), missing_ids=missing)
+
+        flt, op = data.filter, data.operation
+        stmt = update(Product)
+        if flt.search:
+            stmt = stmt.where(Product.nombre.ilike(f"%{flt.search}%"))
+        if flt.brand_id is not None:
+            stmt = stmt.where(Product.brand_id == flt.brand_id)
+        if flt.activo is not None:
+            stmt = stmt.where(Product.activo.is_(flt.activo))
+
+        col = getattr(Product, op.field)
+        if op.op == "set_price":
+            stmt = stmt.values({col: op.value})
+        elif op.op == "percent_change":
+            factor = Decimal(1) + op.value / Decimal(100)
+            stmt = stmt.values({col: func.round(col * factor, 2)})
+        else:
+            stmt = stmt.values(activo=(op.op == "activate"))
+
+        ids = db.scalars(stmt.returning(Product.id).execution_options(synchronize_session=False)).all()
+        if ids:
+            record_changes(db, "product", ids)
+            record_audit(db, "product", None, "bulk_update", {
+                "filter": flt.model_dump(exclude_none=True),
+                "operation": op.model_dump(exclude_none=True),
+                "ids": ids,
+            })
+            notify(db, [{"t": "resync", "scope": "products"}])
+        db.commit()
+        return ProductBulkResult(affected=len(ids))
+
+    except Exception:
+        db.rollback()
+        raise
+
+@router.post("/batch-get", response_model=BatchOut[ProductOut])
+def batch_get_products(data: BatchGetIn, db: Session = Depends(get_read_db)):
+    """Varios productos por id en una sola consulta, en el orden pedido."""
+    items, missing = fetch_by_ids(db, select(Product), Product.id, data.ids)
+    return BatchOut[ProductOut](items=items, missing=missing)
 
 @router.get("/{product_id}", response_model=ProductOut)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+def get_product(product_id: int, db: Session = Depends(get_read_db)):
     product = db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Producto no encontrado.")
     return product
 
-@router.patch("/{product_id}", response_model=ProductOut)
+@router.patch("/{product_id}", response_model=ProductOut, dependencies=[Depends(audit_actor)])
 def update_product(product_id: int, data: ProductUpdate, db: Session = Depends(get_db)):
     product = db.get(Product, product_id)
     if not product:
@@ -110,21 +250,23 @@ def update_product(product_id: int, data: ProductUpdate, db: Session = Depends(g
         setattr(product, field, value)
 
     db.add(product)
+    notify(db, [product_event(product)])
     db.commit()
     db.refresh(product)
     return product
 
-@router.delete("/{product_id}", status_code=204)
+@router.delete("/{product_id}", status_code=204, dependencies=[Depends(audit_actor)])
 def delete_product(product_id: int, db: Session = Depends(get_db)):
     product = db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Producto no encontrado.")
     db.delete(product)
+    notify(db, [{"t": "product_deleted", "id": product_id}])
     db.commit()
     return None
 
 # ---------- Upload de imagen ----------
-@router.post("/{product_id}/image", response_model=ProductOut)
+@router.post("/{product_id}/image", response_model=ProductOut, dependencies=[Depends(audit_actor)])
 async def upload_product_image(
     product_id: int,
     file: UploadFile = File(...),
@@ -0,0 +1,43 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, get_read_db
+from app.api.routes.jobs import accepted
+from app.schemas.job import JobOut
+from app.schemas.report import MarginReportOut
+from app.services.fx import FxRateMissing
+from app.services.jobs import enqueue_job
+from app.services.reports import margin_report
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+@router.get("/margin", response_model=MarginReportOut)
+def get_margin_report(
+    db: Session = Depends(get_read_db),
+    moneda: str = Query("BOB", min_length=3, max_length=3, description="Moneda del reporte (BOB, CLP, ...)"),
+    from_date: Optional[date] = Query(None),
+    to_date: Optional[date] = Query(None),
+):
+    try:
+        return margin_report(db, moneda, from_date, to_date)
+    except FxRateMissing as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/margin", response_model=JobOut, status_code=202)
+def queue_margin_report(
+    response: Response,
+    db: Session = Depends(get_db),
+    moneda: str = Query("BOB", min_length=3, max_length=3),
+    from_date: Optional[date] = Query(None),
+    to_date: Optional[date] = Query(None),
+):
+    """Genera el reporte en segundo plano; el resultado queda en /jobs/{id}/result."""
+    params = {
+        "moneda": moneda.upper(),
+        "from_date": from_date.isoformat() if from_date else None,
+        "to_date": to_date.isoformat() if to_date else None,
+    }
+    return accepted(response, enqueue_job(db, "margin_report", params))
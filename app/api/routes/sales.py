@@ -2,27 +2,34 @@ from collections import defaultdict
 from decimal import Decimal
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
-from sqlalchemy.orm import Session, selectinload
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, func, select, tuple_
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
 
-from app.api.deps import get_db
+from app.api.deps import audit_actor, get_db, get_read_db
 from app.db.models.product import Product
 from app.db.models.sale import Sale, SaleItem
 from app.schemas.sale import SaleCreate, SaleOut
+from app.services.events import notify, product_event, sale_event
+from app.services.fx import FxRateMissing, get_rates
+from app.services.sales import update_sales_stats
+from app.utils.fields import column_attrs, dump_fields, parse_fields
 from datetime import date
 
 router = APIRouter(prefix="/sales", tags=["sales"])
 
-@router.post("", response_model=SaleOut)
+@router.post("", response_model=SaleOut, dependencies=[Depends(audit_actor)])
 def create_sale(data: SaleCreate, db: Session = Depends(get_db)):
     if not data.items:
         raise HTTPException(status_code=400, detail="La venta debe tener al menos un ítem.")
 
     # 1) Validar existencia de productos y stock disponible (bloqueando filas)
     ids = sorted({item.product_id for item in data.items})  # orden estable para evitar deadlocks
+    # FOR NO KEY UPDATE: solo cambia cantidad; no bloquea los chequeos de FK hacia products
+    # (p. ej. los INSERT de rebuild_sales_stats, que espera a las ventas en curso)
     prods = db.execute(
-        select(Product).where(Product.id.in_(ids)).with_for_update()
+        select(Product).where(Product.id.in_(ids)).with_for_update(key_share=True)
     ).scalars().all()
     prod_map = {p.id: p for p in prods}
 
@@ -49,19 +56,33 @@ def create_sale(data: SaleCreate, db: Session = Depends(get_db)):
         db.flush()  # para tener sale.id
 
         total = Decimal("0.00")
+        rates = get_rates(db) if any(it.precio_unitario is not None for it in data.items) else None
         for it in data.items:
             prod = prod_map[it.product_id]
-            # usa precio enviado o el del producto
-            precio = it.precio_unitario_bob if it.precio_unitario_bob is not None else prod.precio_venta
+            # usa precio enviado (en BOB o convertido desde su moneda) o el del producto
+            if it.precio_unitario_bob is not None:
+                precio = it.precio_unitario_bob
+            elif it.precio_unitario is not None:
+                try:
+                    precio = rates.convert(it.precio_unitario, data.fecha_venta, it.moneda, "BOB")
+                except FxRateMissing as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+            else:
+                precio = prod.precio_venta
             if precio is None:
                 raise HTTPException(status_code=400, detail=f"Producto {prod.id} no tiene precio_venta definido.")
             subtotal = (Decimal(str(precio)) * Decimal(it.cantidad)).quantize(Decimal("0.01"))
+            # moneda/precio original solo si el monto llegó en otra moneda
+            foreign = it.precio_unitario is not None and it.moneda != "BOB"
             si = SaleItem(
                 sale_id=sale.id,
+                fecha_venta=sale.fecha_venta,
                 product_id=it.product_id,
                 cantidad=it.cantidad,
                 precio_unitario_bob=precio,
                 subtotal_bob=subtotal,
+                moneda=it.moneda if foreign else "BOB",
+                precio_unitario_orig=it.precio_unitario if foreign else None,
             )
             db.add(si)
             # descontar stock
@@ -69,11 +90,15 @@ def create_sale(data: SaleCreate, db: Session = Depends(get_db)):
             total += subtotal
 
         sale.total_bob = total
+        update_sales_stats(db, data.fecha_venta, req_qty)
+        notify(db, [product_event(prod_map[pid]) for pid in ids] + [sale_event(sale)])
         db.commit()
 
         # Cargar items para respuesta
         db.refresh(sale)
-        items = db.execute(select(SaleItem).where(SaleItem.sale_id == sale.id)).scalars().all()
+        items = db.execute(
+            select(SaleItem).where(SaleItem.sale_id == sale.id, SaleItem.fecha_venta == sale.fecha_venta)
+        ).scalars().all()
         sale.items = items  # para serializar
         return sale
 
@@ -84,33 +109,117 @@ def create_sale(data: SaleCreate, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creando venta: {e}")
 
+def _sales_filters(
+    from_date: date | None,
+    to_date: date | None,
+    product_id: int | None,
+    brand_id: int | None,
+    min_total: Decimal | None,
+    max_total: Decimal | None,
+) -> list:
+    conds = []
+    if from_date:
+        conds.append(Sale.fecha_venta >= from_date)
+    if to_date:
+        conds.append(Sale.fecha_venta <= to_date)
+    if min_total is not None:
+        conds.append(Sale.total_bob >= min_total)
+    if max_total is not None:
+        conds.append(Sale.total_bob <= max_total)
+    # semi-joins por (id, fecha_venta): no multiplican filas de ventas, usan
+    # ix_sale_items_product_sale y, con el rango de fechas repetido sobre sale_items,
+    # solo leen las particiones del rango (el filtro de sales no cruza el join)
+    item_dates = []
+    if from_date:
+        item_dates.append(SaleItem.fecha_venta >= from_date)
+    if to_date:
+        item_dates.append(SaleItem.fecha_venta <= to_date)
+    if product_id is not None:
+        conds.append(tuple_(Sale.id, Sale.fecha_venta).in_(
+            select(SaleItem.sale_id, SaleItem.fecha_venta).where(SaleItem.product_id == product_id, *item_dates)
+        ))
+    if brand_id is not None:
+        conds.append(tuple_(Sale.id, Sale.fecha_venta).in_(
+            select(SaleItem.sale_id, SaleItem.fecha_venta)
+            .join(Product, Product.id == SaleItem.product_id)
+            .where(Product.brand_id == brand_id, *item_dates)
+        ))
+    return conds
+
 @router.get("", response_model=list[SaleOut])
 def list_sales(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
     from_date: date | None = Query(default=None, description="YYYY-MM-DD"),
     to_date: date | None = Query(default=None, description="YYYY-MM-DD"),
+    product_id: int | None = Query(default=None, description="Ventas que contienen este producto"),
+    brand_id: int | None = Query(default=None, description="Ventas con algún producto de esta marca"),
+    min_total: Decimal | None = Query(default=None, ge=0),
+    max_total: Decimal | None = Query(default=None, ge=0),
     limit: int = Query(default=100, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
+    fields: str | None = Query(default=None, description="Campos a devolver, ej. id,fecha_venta,total_bob"),
 ):
+    """
+    Lista ventas filtradas. Los totales de todo el filtro (no solo de la página) se
+    calculan con funciones de ventana en la misma consulta y van en los headers
+    X-Total-Count, X-Total-Bob y X-Total-Units.
+    """
+    cols = parse_fields(fields, SaleOut)
+    conds = _sales_filters(from_date, to_date, product_id, brand_id, min_total, max_total)
+    # unidades de todo el filtro: un solo agregado sobre sale_items contra las ventas
+    # filtradas (CTE), evaluado una vez, no una subconsulta correlacionada por venta
+    filtered = select(Sale.id, Sale.fecha_venta).where(*conds).cte("filtered_sales")
+    units = (
+        select(func.coalesce(func.sum(SaleItem.cantidad), 0))
+        .join(filtered, and_(SaleItem.sale_id == filtered.c.id, SaleItem.fecha_venta == filtered.c.fecha_venta))
+        .scalar_subquery()
+    )
     stmt = (
-        select(Sale)
-        .options(selectinload(Sale.items))   # evita N+1 queries
+        select(
+            Sale,
+            func.count().over().label("total_count"),
+            func.coalesce(func.sum(Sale.total_bob).over(), 0).label("total_bob"),
+            units.label("total_units"),
+        )
+        .where(*conds)
         .order_by(Sale.created_at.desc())
         .limit(limit)
         .offset(offset)
     )
-    if from_date:
-        stmt = stmt.where(Sale.fecha_venta >= from_date)
-    if to_date:
-        stmt = stmt.where(Sale.fecha_venta <= to_date)
-
-    return db.scalars(stmt).all()
+    if cols is None or "items" in cols:
+        stmt = stmt.options(selectinload(Sale.items))   # evita N+1 queries
+    if cols is not None:
+        stmt = stmt.options(load_only(*column_attrs(Sale, cols)))
+    rows = db.execute(stmt).all()
+
+    if rows:
+        _, count, total_bob, total_units = rows[0]
+    else:
+        # página vacía (offset fuera de rango): la ventana no devuelve filas
+        count, total_bob, total_units = db.execute(
+            select(
+                func.count(),
+                func.coalesce(func.sum(Sale.total_bob), 0),
+                units,
+            ).where(*conds)
+        ).one()
+    response.headers["X-Total-Count"] = str(count)
+    response.headers["X-Total-Bob"] = str(total_bob)
+    response.headers["X-Total-Units"] = str(total_units or 0)
+    sales = [r[0] for r in rows]
+    if cols is not None:
+        totals = {k: v for k, v in response.headers.items() if k.startswith("x-total-")}
+        return JSONResponse(dump_fields(SaleOut, cols, sales), headers=totals)
+    return sales
 
 
 @router.get("/{sale_id}", response_model=SaleOut)
-def get_sale(sale_id: int, db: Session = Depends(get_db)):
-    sale = db.get(Sale, sale_id)
+def get_sale(sale_id: int, db: Session = Depends(get_read_db)):
+    # venta + items en una sola consulta
+    sale = db.scalars(
+        select(Sale).options(joinedload(Sale.items)).where(Sale.id == sale_id)
+    ).unique().one_or_none()
     if not sale:
         raise HTTPException(status_code=404, detail="Venta no encontrada.")
-    sale.items = db.execute(select(SaleItem).where(SaleItem.sale_id == sale.id)).scalars().all()
     return sale
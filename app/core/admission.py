@@ -0,0 +1,185 @@
+import asyncio
+import json
+import re
+from collections import deque
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Control de admisión por grupo de rutas: cada grupo tiene un tope de peticiones en curso
+# y una cola acotada; lo que no entra (o espera demasiado) recibe 503 + Retry-After.
+
+# rutas que no pasan por admisión (salud, métricas, streams de larga duración)
+EXEMPT_PREFIXES = ("/health", "/metrics", "/events/stream", "/docs", "/redoc", "/openapi.json", "/static")
+# operaciones pesadas: reportes, cambios masivos, importación de lotes, imágenes
+HEAVY_PREFIXES = ("/reports", "/products/bulk-update")
+_IMAGE_RE = re.compile(r"^/products/\d+/image$")
+
+
+def classify(method: str, path: str) -> str | None:
+    if path == "/" or path.startswith(EXEMPT_PREFIXES):
+        return None
+    if path.startswith(HEAVY_PREFIXES) or _IMAGE_RE.match(path):
+        return "heavy"
+    if method in ("GET", "HEAD", "OPTIONS") or path.endswith("/batch-get"):
+        return "read"
+    if path == "/sales":
+        return "sales"
+    if path.startswith("/lots"):
+        return "heavy"
+    return "write"
+
+
+class Gate:
+    """Semáforo con cola FIFO acotada y contadores."""
+
+    def __init__(self, name: str, limit: int, max_queue: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            return False
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(fut, timeout)
+        except BaseException as e:  # timeout o cliente desconectado
+            if fut.done() and not fut.cancelled():
+                self.release()  # el cupo llegó justo al vencer: se pasa al siguiente
+            else:
+                fut.cancel()
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+                return False
+            raise
+        self.admitted += 1
+        return True  # el cupo lo transfirió release()
+
+    def release(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(True)
+                return
+        self.active -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+
+def parse_limits(value: str) -> dict[str, Gate]:
+    gates = {}
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        name, limit, queue = (p.strip() for p in part.split(":"))
+        gates[name] = Gate(name, int(limit), int(queue))
+    return gates
+
+
+gates: dict[str, Gate] = parse_limits(settings.ADMISSION_LIMITS)
+
+
+def db_connections_needed() -> int:
+    """
+    Tope de conexiones simultáneas al primario. Cada petición admitida usa una (el chequeo
+    de admin del profiler la toma y suelta antes); las lecturas pueden caer al primario si
+    la réplica falla. Cada job en hilo usa dos (estado + trabajo) y el despachador una; con
+    procesos cada hijo tiene su propio pool. El listener de eventos usa su propio engine.
+    """
+    needed = sum(g.limit for g in gates.values()) if settings.ADMISSION_ENABLED else 0
+    needed += 1  # /health (fuera de admisión)
+    if settings.SALES_PARTITIONS_CHECK_HOURS > 0:
+        needed += 1  # hilo que crea las particiones de ventas
+    if settings.AUDIT_ENABLED:
+        needed += 1
+    if settings.JOBS_ENABLED:
+        needed += 1 + (2 * settings.JOBS_WORKERS if settings.JOBS_EXECUTOR == "thread" else 0)
+    return needed
+
+
+def check_capacity() -> None:
+    """Falla al arrancar si los límites de admisión no caben en el pool de DB o en los hilos."""
+    if not settings.ADMISSION_ENABLED:
+        return
+    pool = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    needed = db_connections_needed()
+    if needed > pool:
+        raise RuntimeError(
+            f"ADMISSION_LIMITS y tareas de fondo necesitan {needed} conexiones y el pool admite {pool} "
+            "(DB_POOL_SIZE + DB_MAX_OVERFLOW)"
+        )
+    threads = sum(g.limit for g in gates.values())
+    if threads > settings.THREADPOOL_SIZE:
+        raise RuntimeError(f"ADMISSION_LIMITS suma {threads} peticiones y THREADPOOL_SIZE es {settings.THREADPOOL_SIZE}")
+
+
+def snapshot() -> dict[str, dict]:
+    return {name: g.snapshot() for name, g in gates.items()}
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        gate = gates.get(classify(scope["method"], scope["path"]) or "")
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await gate.acquire(settings.ADMISSION_QUEUE_TIMEOUT_SECONDS):
+            body = json.dumps({"detail": f"Servidor ocupado ({gate.name}); reintente."}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(settings.ADMISSION_RETRY_AFTER_SECONDS).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+
+def add_admission_control(app: FastAPI) -> None:
+    if settings.ADMISSION_ENABLED:
+        app.add_middleware(AdmissionMiddleware)
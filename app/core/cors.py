@@ -10,4 +10,6 @@ def add_cors(app: FastAPI) -> None:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # totales de listados paginados (GET /sales)
+        expose_headers=["X-Total-Count", "X-Total-Bob", "X-Total-Units", "Retry-After"],
     )
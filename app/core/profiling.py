@@ -0,0 +1,257 @@
+import asyncio
+import html
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Perfilado bajo demanda: ?profile=1 (o header X-Profile: 1) reemplaza la respuesta por
+# el perfil de la petición. Formatos: html (por defecto), collapsed (flamegraph.pl /
+# speedscope) o json. Solo fuera de prod, o en prod con token de un ADMIN.
+
+APP_DIR = str(Path(__file__).resolve().parents[1])
+_ROOT_LEN = len(str(Path(APP_DIR).parent)) + 1
+
+# consultas SQL de la petición perfilada (None = no se está perfilando)
+_sql_log: ContextVar[list | None] = ContextVar("profile_sql_log", default=None)
+# marca única de la petición perfilada; viaja en el contexto copiado a los hilos de anyio
+_profile_tag: ContextVar[object | None] = ContextVar("profile_tag", default=None)
+_ANYIO_WORKER_FILE = str(Path("anyio", "_backends", "_asyncio.py"))
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _sql_log.get() is not None:
+        conn.info.setdefault("profile_t0", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    log = _sql_log.get()
+    if log is None or not conn.info.get("profile_t0"):
+        return
+    elapsed = time.perf_counter() - conn.info["profile_t0"].pop()
+    log.append({"sql": statement, "ms": round(elapsed * 1000, 3), "rows": cursor.rowcount})
+
+
+class StackSampler:
+    """
+    Muestrea solo lo que ejecuta la petición perfilada: el hilo del event loop mientras
+    corre su task, y los hilos de anyio (endpoints y dependencias sync) mientras corren
+    algo con su contexto. Se queda con las pilas que pasan por código de app/.
+    """
+
+    def __init__(self, interval: float, loop: asyncio.AbstractEventLoop, task: asyncio.Task, tag: object):
+        self.interval = interval
+        self.loop = loop
+        self.loop_thread = threading.get_ident()
+        self.task = task
+        self.tag = tag
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def __enter__(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _runs_ours(self, frame) -> bool:
+        # WorkerThread.run de anyio ejecuta `context.run(func)` con el contexto copiado de la petición
+        while frame is not None:
+            code = frame.f_code
+            if code.co_name == "run" and code.co_filename.endswith(_ANYIO_WORKER_FILE):
+                ctx = frame.f_locals.get("context")
+                return ctx is not None and ctx.get(_profile_tag) is self.tag
+            frame = frame.f_back
+        return False
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            workers = {t.ident for t in threading.enumerate() if t.name.startswith("AnyIO worker")}
+            for tid, frame in sys._current_frames().items():
+                if tid == self.loop_thread:
+                    # la tarea que corre ahora en el loop (API pública; se puede consultar desde otro hilo)
+                    if asyncio.current_task(self.loop) is not self.task:
+                        continue
+                elif tid not in workers or not self._runs_ours(frame):
+                    continue
+                stack, ours = [], False
+                while frame is not None:
+                    code = frame.f_code
+                    fname = code.co_filename
+                    if fname.startswith(APP_DIR):
+                        ours = True
+                        fname = fname[_ROOT_LEN:]
+                    else:
+                        fname = Path(fname).name
+                    stack.append(f"{code.co_name} ({fname}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if ours:
+                    self.samples[";".join(reversed(stack))] += 1
+
+
+def _render_collapsed(samples: Counter) -> str:
+    return "".join(f"{stack} {n}\n" for stack, n in samples.most_common())
+
+
+def _render_html(samples: Counter, sql: list[dict], wall_ms: float, path: str, status: int | None) -> str:
+    # árbol de llamadas (icicle) con <details>, ancho proporcional a las muestras
+    tree: dict = {}
+    for stack, n in samples.items():
+        node = tree
+        for fn in stack.split(";"):
+            child = node.setdefault(fn, {"n": 0, "c": {}})
+            child["n"] += n
+            node = child["c"]
+    total = sum(samples.values()) or 1
+
+    def render(nodes: dict, depth: int) -> str:
+        out = []
+        for fn, node in sorted(nodes.items(), key=lambda kv: -kv[1]["n"]):
+            pct = 100.0 * node["n"] / total
+            if pct < 0.5:
+                continue
+            label = (
+                f'<span class="bar" style="width:{pct:.1f}%"></span>'
+                f"{pct:5.1f}% {html.escape(fn)}"
+            )
+            inner = render(node["c"], depth + 1)
+            if inner:
+                out.append(f"<details{' open' if pct >= 5 else ''}><summary>{label}</summary>{inner}</details>")
+            else:
+                out.append(f"<div class='leaf'>{label}</div>")
+        return "".join(out)
+
+    sql_ms = sum(q["ms"] for q in sql)
+    rows = "".join(
+        f"<tr><td>{q['ms']:.2f}</td><td>{q['rows']}</td><td><code>{html.escape(q['sql'])}</code></td></tr>"
+        for q in sql
+    )
+    return f"""<!doctype html><html><head><meta charset="utf-8"><title>profile {html.escape(path)}</title>
+<style>
+body{{font:13px monospace;margin:1em}} details{{margin-left:1em}} .leaf{{margin-left:2em}}
+.bar{{display:inline-block;height:.8em;background:#e8743b;margin-right:.5em;max-width:30%}}
+table{{border-collapse:collapse}} td{{border:1px solid #ccc;padding:2px 6px;vertical-align:top}}
+</style></head><body>
+<h3>{html.escape(path)} — status {status} — {wall_ms:.1f} ms — {total} muestras</h3>
+{render(tree, 0)}
+<h3>SQL: {len(sql)} consultas, {sql_ms:.1f} ms</h3>
+<table><tr><th>ms</th><th>filas</th><th>sentencia</th></tr>{rows}</table>
+</body></html>"""
+
+
+def _is_admin_token(headers: dict[bytes, bytes]) -> bool:
+    from app.core.security import decode_token
+    from app.db.models.user import User
+    from app.db.session import SessionLocal
+
+    auth = headers.get(b"authorization", b"").decode("latin-1")
+    if not auth.lower().startswith("bearer "):
+        return False
+    try:
+        username = decode_token(auth[7:]).get("sub")
+    except Exception:
+        return False
+    with SessionLocal() as db:
+        user = db.scalar(select(User).where(User.username == username))
+    return bool(user and user.is_active and user.role == "ADMIN")
+
+
+class ProfilerMiddleware:
+    """
+    Middleware ASGI: sin ?profile ni X-Profile solo cuesta un par de búsquedas en bytes.
+    Va por dentro de hosts/CORS/admisión: un host rechazado sigue dando 400 y el perfil
+    lleva los headers CORS.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        qs = scope.get("query_string", b"")
+        headers = dict(scope.get("headers") or [])
+        if b"profile" not in qs and b"x-profile" not in headers:
+            await self.app(scope, receive, send)
+            return
+
+        params = parse_qs(qs.decode("latin-1"))
+        flag = params.get("profile", [headers.get(b"x-profile", b"").decode("latin-1")])[0]
+        if flag not in ("1", "true", "html", "collapsed", "json"):
+            await self.app(scope, receive, send)
+            return
+        if settings.is_prod and not await run_in_threadpool(_is_admin_token, headers):
+            await self.app(scope, receive, send)
+            return
+        fmt = params.get("profile_format", [flag if flag in ("html", "collapsed", "json") else "html"])[0]
+
+        status: dict[str, int | None] = {"code": None}
+
+        async def discard(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+        sql: list[dict] = []
+        tag = object()
+        token, tag_token = _sql_log.set(sql), _profile_tag.set(tag)
+        t0 = time.perf_counter()
+        try:
+            sampler = StackSampler(
+                settings.PROFILE_INTERVAL_MS / 1000.0, asyncio.get_running_loop(), asyncio.current_task(), tag
+            )
+            with sampler:
+                await self.app(scope, receive, discard)
+        finally:
+            _profile_tag.reset(tag_token)
+            _sql_log.reset(token)
+        wall_ms = (time.perf_counter() - t0) * 1000
+
+        if fmt == "collapsed":
+            body, ctype = _render_collapsed(sampler.samples), "text/plain; charset=utf-8"
+        elif fmt == "json":
+            body = json.dumps({
+                "path": scope["path"],
+                "status": status["code"],
+                "wall_ms": round(wall_ms, 3),
+                "samples": dict(sampler.samples.most_common()),
+                "sql": sql,
+            })
+            ctype = "application/json"
+        else:
+            body = _render_html(sampler.samples, sql, wall_ms, scope["path"], status["code"])
+            ctype = "text/html; charset=utf-8"
+
+        data = body.encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", ctype.encode()),
+                (b"content-length", str(len(data)).encode()),
+                (b"x-profile-sql-count", str(len(sql)).encode()),
+                (b"x-profile-sql-ms", f"{sum(q['ms'] for q in sql):.3f}".encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": data})
+
+
+def add_profiling(app: FastAPI) -> None:
+    app.add_middleware(ProfilerMiddleware)
@@ -0,0 +1,51 @@
+import time
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Cookie con el instante (epoch) hasta el que el cliente debe leer del primario
+PIN_COOKIE = "pm_primary_until"
+# Header para forzar lectura del primario en una petición puntual
+PIN_HEADER = "x-read-primary"
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+def pinned_to_primary(cookies: dict[str, str], headers) -> bool:
+    if headers.get(PIN_HEADER) in ("1", "true"):
+        return True
+    try:
+        return float(cookies.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+class ReadYourWritesMiddleware:
+    """
+    Tras una escritura exitosa marca al cliente (cookie) para que sus lecturas vayan
+    al primario durante READ_YOUR_WRITES_SECONDS, mientras la réplica se pone al día.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # batch-get es POST solo por el tamaño del body: no escribe
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or scope["path"].endswith("/batch-get"):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                seconds = settings.READ_YOUR_WRITES_SECONDS
+                until = int(time.time()) + seconds
+                cookie = f"{PIN_COOKIE}={until}; Max-Age={seconds}; Path=/; HttpOnly; SameSite=Lax"
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+def add_read_your_writes(app: FastAPI) -> None:
+    if settings.DATABASE_READ_URL:
+        app.add_middleware(ReadYourWritesMiddleware)
@@ -1,5 +1,11 @@
 # importa los modelos para que create_all los registre
-from app.db.models.brand import Brand  # noqa: F401
+from app.db.models.audit import AuditLog  # noqa: F401
+from app.db.models.brand import Brand
+from app.db.models.change import Change
+from app.db.models.fx import ExchangeRate
+from app.db.models.job import Job
+from app.db.models.lot import Lot, LotItem
 from app.db.models.product import Product
+from app.db.models.product_stats import ProductSalesStats
 from app.db.models.sale import Sale, SaleItem
-from app.db.models.user import User 
\ No newline at end of file
+from app.db.models.user import User 
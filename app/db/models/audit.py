@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Any
+from sqlalchemy import JSON, BigInteger, DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.session import Base
+
+class AuditLog(Base):
+    """
+    Historial de cambios: quién, qué entidad y el diff {campo: [antes, después]}.
+    Lo escribe en lotes el AuditBuffer (app/services/audit.py), después del commit.
+    El id sigue el orden en que cada worker vacía su buffer (no el orden exacto de
+    commit entre workers); `ts` es la hora del commit. Los listados paginan por id (keyset).
+    """
+    __tablename__ = "audit_log"
+    __table_args__ = (
+        Index("ix_audit_log_entity", "entity", "entity_id", "id"),
+        Index("ix_audit_log_user", "user_id", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    ts: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    # sin FK: el historial sobrevive al usuario
+    user_id: Mapped[int | None] = mapped_column(Integer, default=None)
+    username: Mapped[str | None] = mapped_column(String(50), default=None)
+    entity: Mapped[str] = mapped_column(String(20))          # product | brand | lot | lot_item | sale | sale_item | fx_rate
+    entity_id: Mapped[int | None] = mapped_column(Integer, default=None)  # None en operaciones masivas
+    action: Mapped[str] = mapped_column(String(20))          # create | update | delete | bulk_update | upsert
+    changes: Mapped[dict[str, Any]] = mapped_column(JSON, default=dict)
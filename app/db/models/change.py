@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.session import Base
+
+class Change(Base):
+    """
+    Último cambio de cada entidad, para sincronización incremental (/changes).
+    `seq` es el id de la transacción (pg_current_xact_id) que lo escribió: un cursor
+    por debajo del xmin del snapshot nunca puede recibir cambios nuevos.
+    """
+    __tablename__ = "changes"
+
+    entity: Mapped[str] = mapped_column(String(20), primary_key=True)   # product | brand | lot | sale
+    entity_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    op: Mapped[str] = mapped_column(String(10), default="upsert")       # upsert | delete
+    seq: Mapped[int] = mapped_column(BigInteger, index=True)
+    changed_at: Mapped[datetime] = mapped_column(DateTime(timezone=False), server_default=func.now())
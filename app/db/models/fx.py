@@ -0,0 +1,20 @@
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import Date, DateTime, Numeric, String, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.session import Base
+
+class ExchangeRate(Base):
+    """
+    Tipo de cambio vigente desde `fecha`: cuántos BOB vale 1 unidad de `moneda`.
+    (BOB es la moneda base y no necesita filas.)
+    """
+    __tablename__ = "exchange_rates"
+    __table_args__ = (UniqueConstraint("moneda", "fecha", name="uq_exchange_rates_moneda_fecha"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    moneda: Mapped[str] = mapped_column(String(3), nullable=False)
+    fecha: Mapped[date] = mapped_column(Date, nullable=False)
+    tasa_bob: Mapped[Decimal] = mapped_column(Numeric(18, 6), nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=False), server_default=func.now())
@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Any
+from sqlalchemy import JSON, Boolean, DateTime, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.session import Base
+
+class Job(Base):
+    """
+    Trabajo en segundo plano (exportes, importaciones, reconstrucción de reportes).
+    status: queued -> running -> succeeded | failed | cancelled
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # el despachador busca "queued y ya vencido el run_after"
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    kind: Mapped[str] = mapped_column(String(50), index=True)
+    status: Mapped[str] = mapped_column(String(20), default="queued", server_default="queued")
+    params: Mapped[dict[str, Any]] = mapped_column(JSON, default=dict)
+    result: Mapped[Any | None] = mapped_column(JSON, default=None)
+    error: Mapped[str | None] = mapped_column(Text, default=None)
+
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    max_attempts: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
+
+    run_after: Mapped[datetime] = mapped_column(DateTime(timezone=False), server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=False), server_default=func.now())
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=False), default=None)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=False), default=None)
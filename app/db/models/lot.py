@@ -28,5 +28,9 @@ class LotItem(Base):
     cantidad: Mapped[int] = mapped_column(Integer, nullable=False)
     costo_unitario_bob: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
     subtotal_bob: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    # monto original si la compra fue en otra moneda (ej. CLP); costo_unitario_bob es su
+    # conversión a la fecha del lote. En compras en BOB: moneda="BOB" y costo_unitario_orig NULL
+    moneda: Mapped[str] = mapped_column(String(3), default="BOB", server_default="BOB")
+    costo_unitario_orig: Mapped[Decimal | None] = mapped_column(Numeric(14, 4), default=None)
 
     lot: Mapped["Lot"] = relationship(back_populates="items")
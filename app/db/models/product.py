@@ -12,7 +12,7 @@ class Product(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     nombre: Mapped[str] = mapped_column(String(150), index=True)
-    brand_id: Mapped[Optional[int]] = mapped_column(ForeignKey("brands.id", ondelete="SET NULL"), nullable=True)
+    brand_id: Mapped[Optional[int]] = mapped_column(ForeignKey("brands.id", ondelete="SET NULL"), nullable=True, index=True)
 
     # Precios (ambos DECIMAL(12,2))
     precio_compra: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=0, server_default="0")
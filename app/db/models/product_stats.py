@@ -0,0 +1,20 @@
+from datetime import date, datetime
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.session import Base
+
+class ProductSalesStats(Base):
+    """
+    Estadísticas de venta por producto, mantenidas incrementalmente por create_sale.
+    `velocidad` es la media exponencial (EWMA diaria) de unidades vendidas por día,
+    válida al día `fecha_ref`; para otro día se decae con (1 - alpha) ** días.
+    """
+    __tablename__ = "product_sales_stats"
+
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    velocidad: Mapped[float] = mapped_column(Float, default=0.0, server_default="0")
+    fecha_ref: Mapped[date] = mapped_column(Date, nullable=False)
+    unidades_total: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    ultima_venta: Mapped[date | None] = mapped_column(Date, default=None)
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=False), server_default=func.now(), onupdate=func.now())
@@ -1,14 +1,20 @@
 from datetime import date, datetime
 from decimal import Decimal
-from sqlalchemy import Date, DateTime, ForeignKey, Integer, Numeric, String, func
+from sqlalchemy import Date, DateTime, ForeignKey, ForeignKeyConstraint, Index, Integer, Numeric, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.session import Base
 
 class Sale(Base):
+    """
+    Particionada por mes según fecha_venta (ver app/db/partitions.py). En Postgres la PK
+    debe incluir la clave de partición, pero para el ORM la identidad sigue siendo `id`.
+    """
     __tablename__ = "sales"
+    __table_args__ = {"postgresql_partition_by": "RANGE (fecha_venta)"}
+    __mapper_args__ = {"primary_key": ["id"]}
 
-    id: Mapped[int] = mapped_column(primary_key=True)
-    fecha_venta: Mapped[date] = mapped_column(Date)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    fecha_venta: Mapped[date] = mapped_column(Date, primary_key=True, index=True)
     nota: Mapped[str | None] = mapped_column(String(250), default=None)
 
     total_bob: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=0, server_default="0")
@@ -22,13 +28,27 @@ class Sale(Base):
 
 class SaleItem(Base):
     __tablename__ = "sale_items"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["sale_id", "fecha_venta"], ["sales.id", "sales.fecha_venta"], ondelete="CASCADE"
+        ),
+        # semi-join "ventas que contienen el producto X" resuelto solo con el índice
+        Index("ix_sale_items_product_sale", "product_id", "sale_id"),
+        # misma partición mensual que su venta
+        {"postgresql_partition_by": "RANGE (fecha_venta)"},
+    )
+    __mapper_args__ = {"primary_key": ["id"]}
 
-    id: Mapped[int] = mapped_column(primary_key=True)
-    sale_id: Mapped[int] = mapped_column(ForeignKey("sales.id", ondelete="CASCADE"), index=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    sale_id: Mapped[int] = mapped_column(Integer, index=True)
+    fecha_venta: Mapped[date] = mapped_column(Date, primary_key=True)
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), index=True)
 
     cantidad: Mapped[int] = mapped_column(Integer)
     precio_unitario_bob: Mapped[Decimal] = mapped_column(Numeric(12, 2))
     subtotal_bob: Mapped[Decimal] = mapped_column(Numeric(12, 2))
+    # monto original si la venta se cobró en otra moneda
+    moneda: Mapped[str] = mapped_column(String(3), default="BOB", server_default="BOB")
+    precio_unitario_orig: Mapped[Decimal | None] = mapped_column(Numeric(14, 4), default=None)
 
     sale: Mapped["Sale"] = relationship(back_populates="items")
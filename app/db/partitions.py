@@ -0,0 +1,305 @@
+"""
+Particiones mensuales de `sales` y `sale_items` (RANGE sobre fecha_venta).
+
+    python -m app.db.partitions ensure                  # crea las particiones que falten
+    python -m app.db.partitions migrate                 # convierte tablas existentes sin particionar
+    python -m app.db.partitions archive --before 2024-01  # desacopla y compacta meses viejos
+
+La DDL corre al iniciar, en un hilo de la API cada SALES_PARTITIONS_CHECK_HOURS y desde
+este CLI, nunca dentro de una petición: una venta con fecha fuera de la ventana
+pre-creada cae en la partición DEFAULT, y `ensure` la reparte luego a su mes (los meses
+futuros más allá de la ventana se quedan en DEFAULT, así una fecha mal tipeada no crea
+particiones).
+"""
+import argparse
+import logging
+import re
+import threading
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+
+log = logging.getLogger(__name__)
+
+# orden de creación (la venta antes que sus items); para desacoplar se usa el inverso
+PARTITIONED = ("sales", "sale_items")
+
+_NAME_RE = re.compile(r"^sales_y(\d{4})m(\d{2})$")
+
+# serializa la DDL de particiones entre workers/procesos (pg_advisory_xact_lock)
+_LOCK_KEY = 7_340_034
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def add_months(d: date, n: int) -> date:
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(conn: Connection, table: str = "sales") -> bool:
+    kind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": table}
+    ).scalar()
+    return kind == "p"
+
+
+def existing_months(conn: Connection) -> set[date]:
+    names = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'sales'::regclass"
+    )).scalars()
+    out = set()
+    for name in names:
+        m = _NAME_RE.match(name)
+        if m:
+            out.add(date(int(m.group(1)), int(m.group(2)), 1))
+    return out
+
+
+def _lock(conn: Connection) -> None:
+    conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _LOCK_KEY})
+
+
+def _default_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def _create_default(conn: Connection) -> None:
+    for table in PARTITIONED:
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {_default_name(table)} PARTITION OF {table} DEFAULT"))
+
+
+def default_months(conn: Connection) -> set[date]:
+    """Meses con ventas guardadas en la partición DEFAULT."""
+    if conn.execute(text("SELECT to_regclass(:t)"), {"t": _default_name("sales")}).scalar() is None:
+        return set()
+    return set(conn.execute(text(
+        f"SELECT DISTINCT date_trunc('month', fecha_venta)::date FROM {_default_name('sales')}"
+    )).scalars())
+
+
+def _create_month(conn: Connection, month: date) -> None:
+    """
+    Crea la partición del mes. Si la DEFAULT ya tiene filas de ese mes, Postgres no deja
+    crearla: se sacan a tablas temporales y se reinsertan (ya ruteadas) en la nueva.
+    """
+    desde, hasta = month.isoformat(), add_months(month, 1).isoformat()
+    rng = f"fecha_venta >= '{desde}' AND fecha_venta < '{hasta}'"
+    move = month in default_months(conn)
+    if move:
+        for table in PARTITIONED:
+            conn.execute(text(
+                f"CREATE TEMP TABLE tmp_{table} AS SELECT * FROM {_default_name(table)} WHERE {rng}"
+            ))
+        for table in reversed(PARTITIONED):
+            conn.execute(text(f"DELETE FROM {_default_name(table)} WHERE {rng}"))
+    for table in PARTITIONED:
+        conn.execute(text(
+            f"CREATE TABLE {partition_name(table, month)} "
+            f"PARTITION OF {table} FOR VALUES FROM ('{desde}') TO ('{hasta}')"
+        ))
+    if move:
+        for table in PARTITIONED:
+            conn.execute(text(f"INSERT INTO {table} SELECT * FROM tmp_{table}"))
+            conn.execute(text(f"DROP TABLE tmp_{table}"))
+
+
+def ensure_sales_partitions(engine: Engine, ahead: int | None = None, behind: int | None = None) -> list[date]:
+    """
+    Crea las particiones desde `behind` meses atrás hasta `ahead` meses adelante, y la
+    de cada mes pasado que tenga ventas en la DEFAULT (ventas con fecha atrasada).
+    """
+    ahead = settings.SALES_PARTITIONS_AHEAD if ahead is None else ahead
+    behind = settings.SALES_PARTITIONS_BEHIND if behind is None else behind
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            # sale_items.fecha_venta y la FK compuesta no existen en las tablas viejas:
+            # arrancar así haría fallar todo /sales en tiempo de ejecución
+            raise RuntimeError(
+                "La tabla sales no está particionada (base anterior a las particiones). "
+                "Ejecute `python -m app.db.partitions migrate` antes de iniciar la API."
+            )
+        _lock(conn)
+        _create_default(conn)
+        months = existing_months(conn)
+        hoy = month_start(date.today())
+        last = add_months(hoy, ahead)
+        wanted = {add_months(hoy, i) for i in range(-behind, ahead + 1)}
+        stray = default_months(conn)
+        wanted |= {m for m in stray if m <= last}
+        created = []
+        for m in sorted(wanted - months):
+            _create_month(conn, m)
+            created.append(m)
+    if created:
+        log.info("Particiones de ventas creadas: %s", [m.isoformat() for m in created])
+    future = sorted(m.isoformat() for m in stray if m > last)
+    if future:
+        log.warning("Ventas con fecha futura fuera de la ventana (quedan en sales_default): %s", future)
+    return created
+
+
+class PartitionMaintainer:
+    """
+    Hilo que repite `ensure_sales_partitions` cada `interval` segundos, para que la
+    ventana de meses futuros avance sin reiniciar la API. Con varios workers todos lo
+    corren; el advisory lock los serializa y `ensure` no hace nada si ya está al día.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, engine: Engine) -> None:
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, args=(engine,), name="sales-partitions", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout=30)
+        self._thread = None
+
+    def _run(self, engine: Engine) -> None:
+        while not self._stopping.wait(self.interval):
+            try:
+                ensure_sales_partitions(engine)
+            except Exception:
+                log.exception("No se pudieron crear las particiones de ventas")
+
+
+partition_maintainer = PartitionMaintainer(settings.SALES_PARTITIONS_CHECK_HOURS * 3600)
+
+
+def migrate_to_partitioned(engine: Engine) -> None:
+    """
+    Convierte `sales`/`sale_items` existentes (sin particionar) en tablas particionadas.
+    Las tablas viejas quedan en el esquema `legacy` para borrarlas a mano tras verificar.
+    """
+    from app.db.models.sale import Sale, SaleItem
+
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT to_regclass('sales')")).scalar() is None or is_partitioned(conn):
+            log.info("Nada que migrar.")
+            return
+        conn.execute(text("CREATE SCHEMA IF NOT EXISTS legacy"))
+        # SET SCHEMA mueve también índices, constraints y secuencias propias
+        _lock(conn)
+        conn.execute(text("ALTER TABLE sale_items SET SCHEMA legacy"))
+        conn.execute(text("ALTER TABLE sales SET SCHEMA legacy"))
+        Sale.metadata.create_all(conn, tables=[Sale.__table__, SaleItem.__table__])
+
+        lo, hi = conn.execute(text("SELECT min(fecha_venta), max(fecha_venta) FROM legacy.sales")).one()
+        hoy = month_start(date.today())
+        m = month_start(lo) if lo else hoy
+        last = max(month_start(hi) if hi else hoy, add_months(hoy, settings.SALES_PARTITIONS_AHEAD))
+        while m <= last:
+            _create_month(conn, m)
+            m = add_months(m, 1)
+        _create_default(conn)
+
+        def legacy_cols(table: str) -> list[str]:
+            return list(conn.execute(text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = 'legacy' AND table_name = :t"
+            ), {"t": table}).scalars())
+
+        cols = [c for c in legacy_cols("sales") if c in Sale.__table__.c]
+        conn.execute(text(
+            f"INSERT INTO sales ({', '.join(cols)}) SELECT {', '.join(cols)} FROM legacy.sales"
+        ))
+        cols = [c for c in legacy_cols("sale_items") if c in SaleItem.__table__.c and c != "fecha_venta"]
+        conn.execute(text(
+            f"INSERT INTO sale_items ({', '.join(cols)}, fecha_venta) "
+            f"SELECT {', '.join('si.' + c for c in cols)}, s.fecha_venta "
+            f"FROM legacy.sale_items si JOIN legacy.sales s ON s.id = si.sale_id"
+        ))
+        for table in PARTITIONED:
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(max(id), 0) + 1, false) FROM {table}"
+            ))
+    log.info("Migración completa; las tablas originales quedaron en el esquema legacy.")
+
+
+def archive_partitions(engine: Engine, before: date, tablespace: str | None = None) -> list[str]:
+    """
+    Desacopla los meses anteriores a `before`, los mueve al esquema de archivo
+    (y opcionalmente a otro tablespace) y los compacta con VACUUM FULL.
+    Los datos archivados dejan de verse en los endpoints.
+    """
+    schema = settings.SALES_ARCHIVE_SCHEMA
+    tablespace = tablespace or settings.SALES_ARCHIVE_TABLESPACE
+    cutoff = month_start(before)
+    moved: list[str] = []
+    with engine.begin() as conn:
+        _lock(conn)
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+        for m in sorted(existing_months(conn)):
+            if add_months(m, 1) > cutoff:
+                continue
+            for table in reversed(PARTITIONED):
+                name = partition_name(table, m)
+                conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                # las FKs heredadas quedan como constraints propias: el archivo es solo lectura
+                fks = conn.execute(text(
+                    "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:t) AND contype = 'f'"
+                ), {"t": name}).scalars().all()
+                for fk in fks:
+                    conn.execute(text(f'ALTER TABLE {name} DROP CONSTRAINT "{fk}"'))
+                conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {schema}"))
+                if tablespace:
+                    conn.execute(text(f"ALTER TABLE {schema}.{name} SET TABLESPACE {tablespace}"))
+                moved.append(f"{schema}.{name}")
+
+    # VACUUM no corre dentro de una transacción
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name in moved:
+            conn.execute(text(f"VACUUM (FULL, ANALYZE) {name}"))
+    return moved
+
+
+def _parse_month(value: str) -> date:
+    return date.fromisoformat(f"{value}-01") if len(value) == 7 else month_start(date.fromisoformat(value))
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.db.session import engine
+
+    parser = argparse.ArgumentParser(prog="python -m app.db.partitions")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("ensure", help="crear particiones que falten")
+    p.add_argument("--ahead", type=int, default=None)
+    sub.add_parser("migrate", help="convertir tablas sin particionar")
+    p = sub.add_parser("archive", help="desacoplar y compactar meses viejos")
+    p.add_argument("--before", required=True, help="YYYY-MM: se archivan los meses anteriores")
+    p.add_argument("--tablespace", default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.cmd == "ensure":
+        print([m.isoformat() for m in ensure_sales_partitions(engine, ahead=args.ahead)])
+    elif args.cmd == "migrate":
+        migrate_to_partitioned(engine)
+    else:
+        for name in archive_partitions(engine, _parse_month(args.before), args.tablespace):
+            print(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,22 @@
-from sqlalchemy import create_engine
+import logging
+import threading
+import time
+
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.core.config import settings
 
+log = logging.getLogger(__name__)
+
 class Base(DeclarativeBase):
     pass
 
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
     echo=False,
     future=True,
 )
@@ -18,3 +27,78 @@ SessionLocal = sessionmaker(
     autoflush=False,
     expire_on_commit=False,
 )
+
+# Réplica de lectura opcional (None si no hay DATABASE_READ_URL)
+read_engine = (
+    create_engine(
+        settings.DATABASE_READ_URL,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        echo=False,
+        future=True,
+        connect_args={"connect_timeout": 2},
+    )
+    if settings.DATABASE_READ_URL
+    else None
+)
+
+ReadSessionLocal = (
+    sessionmaker(
+        bind=read_engine,
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    if read_engine is not None
+    else None
+)
+
+# sin escrituras en el primario, now() - último replay crece sin que la réplica esté
+# atrasada: si ya aplicó todo lo recibido, el retraso es 0
+_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+class ReplicaHealth:
+    """Estado de la réplica (caído o con mucho retraso), revisado como máximo cada `interval` s."""
+
+    def __init__(self, interval: float, max_lag: float):
+        self.interval = interval
+        self.max_lag = max_lag
+        self._ok = False
+        self._checked_at: float | None = None
+        self._lock = threading.Lock()
+
+    def ok(self) -> bool:
+        if read_engine is None:
+            return False
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.interval:
+            return self._ok
+        # un solo hilo revisa; el resto usa el último resultado
+        if not self._lock.acquire(blocking=False):
+            return self._ok
+        try:
+            with read_engine.connect() as conn:
+                lag = float(conn.execute(_LAG_SQL).scalar() or 0)
+            self._ok = lag <= self.max_lag
+            if not self._ok:
+                log.warning("Réplica con %.1fs de retraso; leyendo del primario", lag)
+        except Exception:
+            log.warning("Réplica no disponible; leyendo del primario", exc_info=True)
+            self._ok = False
+        finally:
+            self._checked_at = time.monotonic()
+            self._lock.release()
+        return self._ok
+
+    def mark_down(self) -> None:
+        """La réplica falló entre revisiones: no usarla hasta la próxima revisión."""
+        self._ok = False
+        self._checked_at = time.monotonic()
+
+replica_health = ReplicaHealth(settings.REPLICA_CHECK_SECONDS, settings.REPLICA_MAX_LAG_SECONDS)
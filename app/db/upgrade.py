@@ -0,0 +1,42 @@
+"""
+Columnas e índices agregados a tablas que ya existían. create_all solo crea tablas
+nuevas, así que en bases existentes se agregan aquí al iniciar (idempotente).
+Cuando pasemos a Alembic, esto se vuelve la primera migración.
+"""
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+# (tabla, columna, DDL)
+COLUMNS = [
+    ("lot_items", "moneda", "ALTER TABLE lot_items ADD COLUMN IF NOT EXISTS moneda varchar(3) NOT NULL DEFAULT 'BOB'"),
+    ("lot_items", "costo_unitario_orig", "ALTER TABLE lot_items ADD COLUMN IF NOT EXISTS costo_unitario_orig numeric(14, 4)"),
+    ("sale_items", "moneda", "ALTER TABLE sale_items ADD COLUMN IF NOT EXISTS moneda varchar(3) NOT NULL DEFAULT 'BOB'"),
+    ("sale_items", "precio_unitario_orig", "ALTER TABLE sale_items ADD COLUMN IF NOT EXISTS precio_unitario_orig numeric(14, 4)"),
+]
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_products_brand_id ON products (brand_id)",
+]
+
+
+def upgrade_schema(engine: Engine) -> list[str]:
+    """Aplica solo lo que falta: ALTER TABLE toma ACCESS EXCLUSIVE aunque no haya nada que hacer."""
+    applied = []
+    with engine.begin() as conn:
+        existing = set(conn.execute(text(
+            "SELECT table_name, column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema()"
+        )).tuples())
+        for table, column, ddl in COLUMNS:
+            if (table, column) not in existing:
+                conn.execute(text(ddl))
+                applied.append(f"{table}.{column}")
+        for ddl in INDEXES:
+            conn.execute(text(ddl))
+    if applied:
+        log.info("Columnas agregadas: %s", applied)
+    return applied
@@ -1,4 +1,8 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
 from fastapi import FastAPI, Depends
 from sqlalchemy import text
 from sqlalchemy.orm import Session
@@ -9,31 +13,64 @@ if os.path.exists(env_file):
     os.environ["PYDANTIC_ENV_FILE"] = env_file  # opcional: solo informativo
 
 
+from app.core.admission import add_admission_control, check_capacity
 from app.core.config import settings
 from app.core.cors import add_cors
 from app.core.hosts import add_trusted_hosts
+from app.core.profiling import add_profiling
+from app.core.read_routing import add_read_your_writes
 
 from app.api.deps import get_db
 from app.db.session import Base, engine
 from app.db import models
+from app.db.partitions import ensure_sales_partitions, partition_maintainer
+from app.db.upgrade import upgrade_schema
 from app.core.static_files import add_static
-from app.api.routes import brands, products, sales, auth
+from app.api.routes import brands, products, sales, auth, fx, reports, jobs, events, metrics, changes, audit
 from app.api.routes import lots as lots_router
+from app.services.audit import audit_buffer
+from app.services.events import listener as event_listener
+from app.services.jobs import job_runner
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # hilos para endpoints sync (lo comparten todos los grupos de admisión)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    check_capacity()  # límites de admisión vs. pool de DB e hilos
+    # arranque / apagado de servicios en segundo plano
+    if settings.AUDIT_ENABLED:
+        audit_buffer.start()
+    if settings.JOBS_ENABLED:
+        job_runner.start()
+    if settings.EVENTS_ENABLED:
+        event_listener.start(asyncio.get_running_loop())
+    partition_maintainer.start(engine)  # la ventana de meses avanza sin reiniciar
+    yield
+    partition_maintainer.stop()
+    event_listener.stop()
+    job_runner.stop()
+    audit_buffer.stop()  # último: vacía lo que dejaron las peticiones y los jobs
 
 app = FastAPI(
     title="Perfumes Admin API",
+    lifespan=lifespan,
     docs_url="/docs" if not settings.is_prod else None,
     redoc_url="/redoc" if not settings.is_prod else None,
     openapi_url="/openapi.json" if not settings.is_prod else None,
 )
 
-# Middlewares
+# Middlewares (el último agregado es el más externo)
+add_profiling(app)  # el más interno: el perfil pasa por hosts, admisión y CORS
 add_trusted_hosts(app)
+add_admission_control(app)  # dentro de CORS, para que los 503 lleven sus headers
 add_cors(app)
+add_read_your_writes(app)
 add_static(app)
 
 # crea tablas al vuelo (luego pasamos a Alembic)
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)  # columnas nuevas en tablas existentes
+ensure_sales_partitions(engine)
 
 @app.get("/")
 def root():
@@ -55,4 +92,11 @@ app.include_router(products.router)
 app.include_router(sales.router)
 app.include_router(auth.router)
 app.include_router(lots_router.router)
+app.include_router(fx.router)
+app.include_router(reports.router)
+app.include_router(jobs.router)
+app.include_router(events.router)
+app.include_router(metrics.router)
+app.include_router(changes.router)
+app.include_router(audit.router)
 
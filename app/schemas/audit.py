@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Any, List, Optional
+from pydantic import BaseModel, ConfigDict
+
+class AuditOut(BaseModel):
+    id: int
+    ts: datetime
+    user_id: Optional[int] = None
+    username: Optional[str] = None
+    entity: str
+    entity_id: Optional[int] = None
+    action: str
+    changes: dict[str, Any]            # {campo: [antes, después]} o detalle de la operación masiva
+    model_config = ConfigDict(from_attributes=True)
+
+class AuditPage(BaseModel):
+    items: List[AuditOut]
+    next_before: Optional[int] = None  # pasar como ?before= para la página siguiente
@@ -0,0 +1,12 @@
+from typing import Generic, List, TypeVar
+from pydantic import BaseModel, Field
+
+T = TypeVar("T")
+
+class BatchGetIn(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=5000)
+
+# Resultado en el orden de `ids` (sin repetidos); los que no existen van en `missing`
+class BatchOut(BaseModel, Generic[T]):
+    items: List[T]
+    missing: List[int] = Field(default_factory=list)
@@ -0,0 +1,16 @@
+from typing import Dict, List
+from pydantic import BaseModel, Field
+
+from app.schemas.brand import BrandOut
+from app.schemas.lot import LotOut
+from app.schemas.product import ProductOut
+from app.schemas.sale import SaleOut
+
+class ChangesOut(BaseModel):
+    cursor: int                      # pasar como ?since= en la próxima llamada
+    has_more: bool                   # quedan cambios: volver a llamar enseguida
+    products: List[ProductOut] = Field(default_factory=list)
+    brands: List[BrandOut] = Field(default_factory=list)
+    lots: List[LotOut] = Field(default_factory=list)
+    sales: List[SaleOut] = Field(default_factory=list)
+    deleted: Dict[str, List[int]] = Field(default_factory=dict)   # tombstones por entidad
@@ -0,0 +1,17 @@
+from datetime import date
+from decimal import Decimal
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+class ExchangeRateIn(BaseModel):
+    moneda: str = Field(min_length=3, max_length=3)
+    fecha: date
+    tasa_bob: Decimal = Field(gt=0)   # BOB por 1 unidad de moneda
+
+    @field_validator("moneda")
+    @classmethod
+    def _upper(cls, v: str) -> str:
+        return v.upper()
+
+class ExchangeRateOut(ExchangeRateIn):
+    id: int
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Any, Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+class JobCreate(BaseModel):
+    kind: str
+    params: dict[str, Any] = Field(default_factory=dict)
+    max_attempts: Optional[int] = Field(default=None, ge=1, le=10)
+
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    status: str
+    params: dict[str, Any]
+    error: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    cancel_requested: bool
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
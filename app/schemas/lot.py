@@ -1,12 +1,24 @@
 from datetime import date, datetime
 from decimal import Decimal
 from typing import Optional, List
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 
 class LotItemCreate(BaseModel):
     product_id: int
     cantidad: int = Field(gt=0)
-    costo_unitario_bob: Decimal = Field(ge=0)
+    costo_unitario_bob: Optional[Decimal] = Field(default=None, ge=0)
+    # compra en otra moneda (ej. CLP): se convierte a BOB con la tasa de la fecha del lote
+    moneda: str = Field(default="BOB", min_length=3, max_length=3)
+    costo_unitario: Optional[Decimal] = Field(default=None, ge=0)
+
+    @model_validator(mode="after")
+    def _check_costo(self):
+        self.moneda = self.moneda.upper()
+        if self.moneda == "BOB" and self.costo_unitario_bob is None:
+            self.costo_unitario_bob = self.costo_unitario
+        if self.costo_unitario_bob is None and self.costo_unitario is None:
+            raise ValueError("Se requiere costo_unitario_bob o costo_unitario.")
+        return self
 
 class LotCreate(BaseModel):
     nombre: str
@@ -20,6 +32,8 @@ class LotItemOut(BaseModel):
     cantidad: int
     costo_unitario_bob: Decimal
     subtotal_bob: Decimal
+    moneda: str = "BOB"
+    costo_unitario_orig: Optional[Decimal] = None
     model_config = ConfigDict(from_attributes=True)
 
 class LotOut(BaseModel):
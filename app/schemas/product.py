@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional
-from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 # Para reflejar el estado real del producto (stock puede ser 0)
 class ProductBase(BaseModel):
@@ -34,3 +34,61 @@ class ProductOut(ProductBase):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     model_config = ConfigDict(from_attributes=True)
+
+# Reposición: velocidad de venta y pedido sugerido por producto
+class ReorderOut(BaseModel):
+    product_id: int
+    nombre: str
+    brand_id: Optional[int] = None
+    cantidad: int
+    velocidad_diaria: float               # unidades/día (EWMA) al día de hoy
+    dias_cobertura: Optional[float] = None  # None si no hay ventas
+    punto_pedido: float
+    cantidad_sugerida: int
+    ultima_venta: Optional[date] = None
+
+# Actualización masiva: lista {id, fields} o filtro + operación (un solo UPDATE por lote)
+class ProductBulkItem(BaseModel):
+    id: int
+    fields: ProductUpdate
+
+class ProductBulkFilter(BaseModel):
+    brand_id: Optional[int] = None
+    activo: Optional[bool] = None
+    search: Optional[str] = None           # por nombre, igual que en list_products
+    all: bool = False                      # confirmación explícita para aplicar a todo el catálogo
+
+    def has_criteria(self) -> bool:
+        return self.brand_id is not None or self.activo is not None or bool(self.search)
+
+class ProductBulkOperation(BaseModel):
+    op: Literal["set_price", "percent_change", "activate", "deactivate"]
+    field: Literal["precio_venta", "precio_compra"] = "precio_venta"
+    value: Optional[Decimal] = None        # precio nuevo o porcentaje (ej. -10 = 10% menos)
+
+    @model_validator(mode="after")
+    def _check_value(self):
+        if self.op == "set_price" and (self.value is None or self.value < 0):
+            raise ValueError("set_price requiere value >= 0")
+        if self.op == "percent_change" and (self.value is None or self.value <= -100):
+            raise ValueError("percent_change requiere value > -100")
+        return self
+
+class ProductBulkUpdate(BaseModel):
+    items: Optional[List[ProductBulkItem]] = Field(default=None, max_length=5000)
+    filter: Optional[ProductBulkFilter] = None
+    operation: Optional[ProductBulkOperation] = None
+
+    @model_validator(mode="after")
+    def _check_mode(self):
+        if self.items is not None and (self.filter is not None or self.operation is not None):
+            raise ValueError("Use items o filter+operation, no ambos.")
+        if self.items is None and (self.filter is None or self.operation is None):
+            raise ValueError("Se requiere items, o filter junto con operation.")
+        if self.filter is not None and not self.filter.has_criteria() and not self.filter.all:
+            raise ValueError("El filtro está vacío: indique algún criterio o all=true para todo el catálogo.")
+        return self
+
+class ProductBulkResult(BaseModel):
+    affected: int
+    missing_ids: List[int] = Field(default_factory=list)
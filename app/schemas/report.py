@@ -0,0 +1,24 @@
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
+from pydantic import BaseModel
+
+class MarginRow(BaseModel):
+    product_id: int
+    nombre: Optional[str] = None
+    unidades: int
+    ingresos: Decimal
+    costo: Decimal
+    margen: Decimal
+    margen_pct: Optional[Decimal] = None
+
+class MarginReportOut(BaseModel):
+    moneda: str
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+    rows: List[MarginRow]
+    # totales del reporte
+    unidades: int
+    ingresos: Decimal
+    costo: Decimal
+    margen: Decimal
@@ -1,12 +1,20 @@
 from datetime import date, datetime
 from decimal import Decimal
 from typing import List, Optional
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 class SaleItemIn(BaseModel):
     product_id: int
     cantidad: int = Field(gt=0)
     precio_unitario_bob: Optional[Decimal] = Field(default=None, ge=0)
+    # cobro en otra moneda: se convierte a BOB con la tasa de fecha_venta
+    moneda: str = Field(default="BOB", min_length=3, max_length=3)
+    precio_unitario: Optional[Decimal] = Field(default=None, ge=0)
+
+    @field_validator("moneda")
+    @classmethod
+    def _upper(cls, v: str) -> str:
+        return v.upper()
 
 class SaleCreate(BaseModel):
     fecha_venta: date
@@ -19,6 +27,8 @@ class SaleItemOut(BaseModel):
     cantidad: int
     precio_unitario_bob: Decimal
     subtotal_bob: Decimal
+    moneda: str = "BOB"
+    precio_unitario_orig: Optional[Decimal] = None
     model_config = ConfigDict(from_attributes=True)
 
 class SaleOut(BaseModel):
@@ -0,0 +1,226 @@
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Optional
+
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.audit import AuditLog
+from app.db.models.brand import Brand
+from app.db.models.lot import Lot, LotItem
+from app.db.models.product import Product
+from app.db.models.sale import Sale, SaleItem
+from app.db.session import SessionLocal, engine
+
+log = logging.getLogger(__name__)
+
+AUDITED = {
+    Product: "product",
+    Brand: "brand",
+    Lot: "lot",
+    LotItem: "lot_item",
+    Sale: "sale",
+    SaleItem: "sale_item",
+}
+
+
+def _jsonable(v: Any) -> Any:
+    if v is None or isinstance(v, (bool, int, float, str)):
+        return v
+    if isinstance(v, Decimal):
+        return str(v)
+    if isinstance(v, dict):
+        return {str(k): _jsonable(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple, set)):
+        return [_jsonable(x) for x in v]
+    if hasattr(v, "isoformat"):
+        return v.isoformat()
+    return str(v)  # p. ej. func.now() asignado a un campo
+
+
+class AuditBuffer:
+    """
+    Buffer write-behind: los commits solo encolan en memoria y un hilo de fondo
+    inserta en lotes. Acotado: si se llena, quien encola escribe él mismo (no se
+    pierde nada salvo que la DB falle con el buffer lleno).
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_seconds: float):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.dropped = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._queue: deque[dict[str, Any]] = deque()
+        self._lock = threading.Lock()        # protege la cola
+        self._flush_lock = threading.Lock()  # un solo escritor a la vez
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join(timeout=self.flush_seconds + 10)
+        self._thread = None
+        self.flush()  # lo que quede al apagar
+
+    def add(self, entries: list[dict[str, Any]]) -> None:
+        with self._lock:
+            self._queue.extend(entries)
+            n = len(self._queue)
+        if self._thread is None or n >= self.max_size:
+            # sin hilo (scripts, procesos de jobs) o buffer lleno: se escribe aquí mismo
+            self.flush()
+        elif n >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> int:
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                if not batch:
+                    break
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(insert(AuditLog), batch)
+                except Exception:
+                    log.exception("No se pudo escribir la auditoría (%d filas)", len(batch))
+                    self._requeue(batch)
+                    break
+                written += len(batch)
+        return written
+
+    def _requeue(self, batch: list[dict[str, Any]]) -> None:
+        with self._lock:
+            room = max(self.max_size - len(self._queue), 0)
+            if room < len(batch):
+                lost = len(batch) - room
+                self.dropped += lost
+                log.error("Buffer de auditoría lleno: se descartan %d filas", lost)
+                batch = batch[lost:]
+            self._queue.extendleft(reversed(batch))
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                log.exception("Error en el escritor de auditoría")
+
+
+audit_buffer = AuditBuffer(
+    max_size=settings.AUDIT_BUFFER_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_seconds=settings.AUDIT_FLUSH_SECONDS,
+)
+# hijo de fork (JOBS_EXECUTOR=process): el hilo escritor no existe ahí, los locks pueden
+# haber quedado tomados y lo encolado es del padre (que lo escribe él); sin hilo, add()
+# escribe en el momento
+os.register_at_fork(after_in_child=audit_buffer._reset)
+
+
+def record_audit(db: Session, entity: str, entity_id: Optional[int], action: str, changes: dict[str, Any]) -> None:
+    """Registra una operación hecha fuera del ORM (UPDATE masivos, upserts); se escribe al hacer commit."""
+    if settings.AUDIT_ENABLED:
+        db.info.setdefault("audit_extra", []).append({
+            "entity": entity,
+            "entity_id": entity_id,
+            "action": action,
+            "changes": _jsonable(changes),
+        })
+
+
+def _diff(session: Session, obj: Any) -> tuple[str, dict[str, list[Any]]]:
+    state = inspect(obj)
+    keys = state.mapper.column_attrs.keys()
+    if obj in session.new:
+        return "create", {k: [None, _jsonable(state.dict[k])] for k in keys if k in state.dict}
+    if obj in session.deleted:
+        return "delete", {k: [_jsonable(state.dict[k]), None] for k in keys if k in state.dict}
+    out = {}
+    for k in keys:
+        hist = state.attrs[k].history
+        if not hist.has_changes():
+            continue
+        before = _jsonable(hist.deleted[0]) if hist.deleted else None
+        after = _jsonable(hist.added[0]) if hist.added else None
+        if before != after:
+            out[k] = [before, after]
+    return "update", out
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _after_flush(session: Session, flush_context) -> None:
+    # en after_flush la historia de atributos sigue disponible; se acumula por
+    # transacción (varios flush de una misma fila se combinan en una entrada)
+    if not settings.AUDIT_ENABLED:
+        return
+    pending: dict[tuple[str, int], dict[str, Any]] = session.info.setdefault("audit_pending", {})
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        entity = AUDITED.get(type(obj))
+        if entity is None:
+            continue
+        action, diff = _diff(session, obj)
+        if not diff:
+            continue
+        key = (entity, obj.id)
+        prev = pending.get(key)
+        if prev is None:
+            pending[key] = {"entity": entity, "entity_id": obj.id, "action": action, "changes": diff}
+            continue
+        for k, (before, after) in diff.items():
+            if k in prev["changes"]:
+                prev["changes"][k][1] = after
+            else:
+                prev["changes"][k] = [before, after]
+        if action == "delete":
+            prev["action"] = "delete"
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _after_commit(session: Session) -> None:
+    pending = session.info.pop("audit_pending", {})
+    extra = session.info.pop("audit_extra", [])
+    if not pending and not extra:
+        return
+    user_id, username = session.info.get("actor", (None, None))
+    ts = datetime.now(timezone.utc)
+    rows = [
+        {**e, "ts": ts, "user_id": user_id, "username": username}
+        for e in (*pending.values(), *extra)
+    ]
+    try:
+        audit_buffer.add(rows)
+    except Exception:
+        # el commit ya ocurrió: la auditoría nunca debe romper la petición
+        log.exception("No se pudo encolar la auditoría")
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop("audit_pending", None)
+    session.info.pop("audit_extra", None)
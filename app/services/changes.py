@@ -0,0 +1,73 @@
+from typing import Iterable
+
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import Session
+
+from app.db.models.brand import Brand
+from app.db.models.lot import Lot, LotItem
+from app.db.models.product import Product
+from app.db.models.sale import Sale, SaleItem
+from app.db.session import SessionLocal
+
+# entidades sincronizables y, para los renglones, a qué entidad padre cuentan
+TRACKED = {Product: "product", Brand: "brand", Lot: "lot", Sale: "sale"}
+CHILDREN = {LotItem: ("lot", "lot_id"), SaleItem: ("sale", "sale_id")}
+
+_UPSERT_SQL = text("""
+    INSERT INTO changes (entity, entity_id, op, seq, changed_at)
+    SELECT e, i, o, pg_current_xact_id()::text::bigint, now()
+    FROM unnest(CAST(:entities AS text[]), CAST(:ids AS int[]), CAST(:ops AS text[])) AS t(e, i, o)
+    ON CONFLICT (entity, entity_id)
+    DO UPDATE SET op = EXCLUDED.op, seq = EXCLUDED.seq, changed_at = EXCLUDED.changed_at
+""")
+
+_XMIN_SQL = text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+def _write(db_or_conn, changes: dict[tuple[str, int], str]) -> None:
+    if not changes:
+        return
+    keys = list(changes)
+    db_or_conn.execute(_UPSERT_SQL, {
+        "entities": [k[0] for k in keys],
+        "ids": [k[1] for k in keys],
+        "ops": [changes[k] for k in keys],
+    })
+
+
+def record_changes(db: Session, entity: str, ids: Iterable[int], op: str = "upsert") -> None:
+    """Registra cambios hechos fuera del ORM (UPDATE masivos) en la transacción actual."""
+    _write(db, {(entity, i): op for i in ids})
+
+
+def current_cursor(db: Session) -> int:
+    """Cursor seguro: toda transacción con id menor ya terminó."""
+    return int(db.execute(_XMIN_SQL).scalar())
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _before_flush(session: Session, flush_context, instances) -> None:
+    # al borrar una marca la FK deja brand_id = NULL en sus productos (ON DELETE SET NULL),
+    # cambio que el ORM no ve: hay que capturar esos productos antes del DELETE
+    brand_ids = [o.id for o in session.deleted if isinstance(o, Brand)]
+    if brand_ids:
+        pids = session.connection().execute(
+            select(Product.id).where(Product.brand_id.in_(brand_ids))
+        ).scalars().all()
+        session.info.setdefault("changes_extra", {}).update({("product", pid): "upsert" for pid in pids})
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _after_flush(session: Session, flush_context) -> None:
+    changes: dict[tuple[str, int], str] = session.info.pop("changes_extra", {})
+    for objs, op in ((session.new, "upsert"), (session.dirty, "upsert"), (session.deleted, "delete")):
+        for obj in objs:
+            cls = type(obj)
+            if cls in TRACKED:
+                if op == "upsert" and obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                    continue
+                changes[(TRACKED[cls], obj.id)] = op
+            elif cls in CHILDREN:
+                parent, fk = CHILDREN[cls]
+                changes.setdefault((parent, getattr(obj, fk)), "upsert")
+    _write(session.connection(), changes)
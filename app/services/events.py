@@ -0,0 +1,168 @@
+import asyncio
+import json
+import logging
+import select as _select
+import threading
+from decimal import Decimal
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+
+log = logging.getLogger(__name__)
+
+# Canal de Postgres por el que viajan los eventos entre workers de uvicorn
+CHANNEL = "pm_events"
+
+_NOTIFY_SQL = text("SELECT pg_notify(:channel, p) FROM unnest(CAST(:payloads AS text[])) AS p")
+
+
+def _default(v: Any) -> Any:
+    if isinstance(v, Decimal):
+        return str(v)
+    if hasattr(v, "isoformat"):
+        return v.isoformat()
+    raise TypeError(type(v).__name__)
+
+
+def product_event(prod) -> dict[str, Any]:
+    return {
+        "t": "product",
+        "id": prod.id,
+        "cantidad": prod.cantidad,
+        "precio_venta": prod.precio_venta,
+        "precio_compra": prod.precio_compra,
+        "activo": prod.activo,
+    }
+
+
+def sale_event(sale) -> dict[str, Any]:
+    return {"t": "sale", "id": sale.id, "fecha_venta": sale.fecha_venta, "total_bob": sale.total_bob}
+
+
+def notify(db: Session, events: Iterable[dict[str, Any]]) -> None:
+    """
+    Encola eventos con pg_notify dentro de la transacción actual: Postgres solo
+    los entrega si la transacción hace commit (y en un solo round trip).
+    """
+    payloads = [json.dumps(e, default=_default, separators=(",", ":")) for e in events]
+    if payloads:
+        db.execute(_NOTIFY_SQL, {"channel": CHANNEL, "payloads": payloads})
+
+
+class Subscriber:
+    """Cola acotada por cliente: si el cliente es lento se descarta lo más viejo y se le pide resync."""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def push(self, payload: str) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.overflowed = True
+        self.queue.put_nowait(payload)
+
+
+class EventBroker:
+    """Reparte los eventos recibidos por LISTEN a los clientes SSE de este proceso."""
+
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        self._subs: set[Subscriber] = set()
+
+    def subscribe(self) -> Subscriber:
+        sub = Subscriber(self.buffer_size)
+        self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self._subs.discard(sub)
+
+    def publish(self, payload: str) -> None:
+        # corre en el event loop (call_soon_threadsafe desde el listener)
+        for sub in self._subs:
+            sub.push(payload)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subs)
+
+
+class PgListener:
+    """Hilo con una conexión dedicada haciendo LISTEN; reenvía cada NOTIFY al broker."""
+
+    def __init__(self, broker: EventBroker):
+        self.broker = broker
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._engine = None
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._thread is not None:
+            return
+        self._loop = loop
+        self._stopping.clear()
+        self._engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+        self._thread = threading.Thread(target=self._run, name="pg-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout=5)
+        self._engine.dispose()
+        self._thread = self._engine = None
+
+    def _dispatch(self, payload: str) -> None:
+        self._loop.call_soon_threadsafe(self.broker.publish, payload)
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stopping.is_set():
+            raw = None
+            try:
+                raw = self._engine.raw_connection()
+                conn = raw.driver_connection
+                if self._engine.dialect.driver == "psycopg2":
+                    self._listen_psycopg2(conn)
+                else:
+                    self._listen_psycopg(conn)
+                backoff = 1.0
+            except Exception:
+                log.warning("LISTEN %s se cortó; reintentando en %.0fs", CHANNEL, backoff, exc_info=True)
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+
+    def _listen_psycopg(self, conn) -> None:
+        conn.autocommit = True
+        conn.execute(f"LISTEN {CHANNEL}")
+        while not self._stopping.is_set():
+            for n in conn.notifies(timeout=1.0):
+                self._dispatch(n.payload)
+
+    def _listen_psycopg2(self, conn) -> None:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+        while not self._stopping.is_set():
+            if _select.select([conn], [], [], 1.0) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                self._dispatch(conn.notifies.pop(0).payload)
+
+
+broker = EventBroker(settings.EVENTS_CLIENT_BUFFER)
+listener = PgListener(broker)
@@ -0,0 +1,97 @@
+import threading
+import time
+from bisect import bisect_right
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.fx import ExchangeRate
+
+BASE_CURRENCY = "BOB"
+_CENT = Decimal("0.01")
+
+
+class FxRateMissing(ValueError):
+    """No hay tipo de cambio cargado para la moneda en esa fecha (o antes)."""
+
+
+class RateCache:
+    """
+    Tipos de cambio en memoria, indexados por moneda y fecha.
+    Para cada moneda guarda fechas ordenadas + tasas; la tasa de un día es la última
+    vigente en o antes de ese día (bisect). Se recarga entera tras `ttl` segundos o
+    cuando este proceso escribe tasas (invalidate).
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._rates: dict[str, tuple[list[date], list[Decimal]]] = {}
+        self._loaded_at: float | None = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+    def ensure_loaded(self, db: Session) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.ttl:
+            return
+        rows = db.execute(
+            select(ExchangeRate.moneda, ExchangeRate.fecha, ExchangeRate.tasa_bob)
+            .order_by(ExchangeRate.moneda, ExchangeRate.fecha)
+        ).all()
+        rates: dict[str, tuple[list[date], list[Decimal]]] = {}
+        for moneda, fecha, tasa in rows:
+            fechas, tasas = rates.setdefault(moneda, ([], []))
+            fechas.append(fecha)
+            tasas.append(Decimal(tasa))
+        with self._lock:
+            self._rates = rates
+            self._loaded_at = time.monotonic()
+
+    def rate(self, moneda: str, fecha: date) -> Decimal:
+        """BOB por 1 unidad de `moneda` vigente en `fecha`."""
+        moneda = moneda.upper()
+        if moneda == BASE_CURRENCY:
+            return Decimal(1)
+        serie = self._rates.get(moneda)
+        if serie is not None:
+            i = bisect_right(serie[0], fecha) - 1
+            if i >= 0:
+                return serie[1][i]
+        raise FxRateMissing(f"Sin tipo de cambio {moneda}/BOB para {fecha.isoformat()}")
+
+    def rates_for(self, moneda: str, fechas: Iterable[date]) -> dict[date, Decimal]:
+        """Resuelve una sola vez cada fecha distinta (para convertir resultados completos)."""
+        return {f: self.rate(moneda, f) for f in set(fechas)}
+
+    def convert(self, monto: Decimal, fecha: date, desde: str, hacia: str) -> Decimal:
+        if desde.upper() == hacia.upper():
+            return Decimal(monto)
+        return (Decimal(monto) * self.rate(desde, fecha) / self.rate(hacia, fecha)).quantize(_CENT)
+
+    def convert_many(
+        self, montos: Sequence[tuple[date, Decimal]], desde: str, hacia: str
+    ) -> list[Decimal]:
+        """Convierte (fecha, monto) en bloque: un factor por fecha distinta, no por fila."""
+        if desde.upper() == hacia.upper():
+            return [Decimal(m) for _, m in montos]
+        fechas = [f for f, _ in montos]
+        num = self.rates_for(desde, fechas)
+        den = self.rates_for(hacia, fechas)
+        factor = {f: num[f] / den[f] for f in num}
+        return [(Decimal(m) * factor[f]).quantize(_CENT) for f, m in montos]
+
+
+rate_cache = RateCache(ttl=settings.FX_CACHE_TTL_SECONDS)
+
+
+def get_rates(db: Session) -> RateCache:
+    """Devuelve la caché de tipos de cambio, cargándola si venció."""
+    rate_cache.ensure_loaded(db)
+    return rate_cache
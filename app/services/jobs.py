@@ -0,0 +1,251 @@
+import logging
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Callable, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.job import Job
+from app.db.session import SessionLocal, engine
+
+log = logging.getLogger(__name__)
+
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Lo lanza JobContext.check_cancelled() cuando se pidió cancelar el job."""
+
+
+class JobContext:
+    """Lo que recibe un handler: su propia sesión de DB y el chequeo de cancelación."""
+
+    def __init__(self, job_id: int, db: Session):
+        self.job_id = job_id
+        self.db = db
+
+    def cancelled(self) -> bool:
+        with SessionLocal() as s:
+            return bool(s.scalar(select(Job.cancel_requested).where(Job.id == self.job_id)))
+
+    def check_cancelled(self) -> None:
+        if self.cancelled():
+            raise JobCancelled()
+
+
+Handler = Callable[[JobContext, dict[str, Any]], Any]
+_HANDLERS: dict[str, Handler] = {}
+
+
+def job_handler(kind: str) -> Callable[[Handler], Handler]:
+    """Registra una función como handler de un tipo de job."""
+    def deco(fn: Handler) -> Handler:
+        _HANDLERS[kind] = fn
+        return fn
+    return deco
+
+
+def enqueue_job(db: Session, kind: str, params: Optional[dict[str, Any]] = None, max_attempts: Optional[int] = None) -> Job:
+    if kind not in _HANDLERS:
+        raise ValueError(f"Tipo de job desconocido: {kind}")
+    job = Job(
+        kind=kind,
+        status="queued",
+        params=params or {},
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    job_runner.wake()
+    return job
+
+
+def cancel_job(db: Session, job: Job) -> Job:
+    """Cancela de inmediato si está en cola; si está corriendo, marca cancel_requested."""
+    if job.status == "queued":
+        job.status = "cancelled"
+        job.finished_at = func.now()
+    job.cancel_requested = True
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return value
+
+
+def _execute_job(job_id: int) -> None:
+    """Corre un job ya reclamado (status=running). Módulo-nivel para poder usarse con procesos."""
+    with SessionLocal() as db:
+        job = db.get(Job, job_id)
+        if job is None:
+            return
+        if job.cancel_requested:
+            job.status, job.finished_at = "cancelled", func.now()
+            db.commit()
+            return
+        handler = _HANDLERS.get(job.kind)
+        params = dict(job.params or {})
+        db.commit()  # no dejar la transacción abierta mientras corre el handler
+
+        with SessionLocal() as work_db:
+            try:
+                if handler is None:
+                    raise ValueError(f"Tipo de job desconocido: {job.kind}")
+                result = _to_json(handler(JobContext(job_id, work_db), params))
+            except JobCancelled:
+                work_db.rollback()
+                job.status, job.finished_at = "cancelled", func.now()
+            except Exception as e:
+                work_db.rollback()
+                log.exception("Job %s (%s) falló", job_id, job.kind)
+                job.error = f"{type(e).__name__}: {e}"
+                if job.attempts < job.max_attempts and handler is not None:
+                    backoff = settings.JOBS_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+                    job.status = "queued"
+                    job.run_after = func.now() + timedelta(seconds=backoff)
+                else:
+                    job.status, job.finished_at = "failed", func.now()
+            else:
+                # se pidió cancelar mientras corría y el handler no llegó a verlo
+                if db.scalar(select(Job.cancel_requested).where(Job.id == job_id)):
+                    job.status, job.finished_at = "cancelled", func.now()
+                else:
+                    job.status, job.result, job.error, job.finished_at = "succeeded", result, None, func.now()
+        db.commit()
+
+
+def _init_worker_process() -> None:
+    # el pool de conexiones heredado del padre no se puede compartir tras fork
+    engine.dispose(close=False)
+
+
+class JobRunner:
+    """
+    Despachador local: reclama jobs en cola con FOR UPDATE SKIP LOCKED (seguro con
+    varios workers de uvicorn) y los ejecuta en un pool de hilos o procesos.
+    """
+
+    def __init__(self, workers: int, mode: str, poll_seconds: float):
+        self.workers = max(1, workers)
+        self.mode = mode
+        self.poll_seconds = poll_seconds
+        self._executor: Optional[Executor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._inflight: set[Future] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self.running:
+            return
+        if self.mode == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker_process)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self._stopping.clear()
+        self._requeue_stale()
+        self._thread = threading.Thread(target=self._loop, name="job-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        if not self.running:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join(timeout=self.poll_seconds + 5)
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._thread = self._executor = None
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _requeue_stale(self) -> None:
+        # jobs "running" de un proceso que murió
+        with SessionLocal() as db:
+            db.execute(
+                update(Job)
+                .where(
+                    Job.status == "running",
+                    Job.started_at < func.now() - timedelta(seconds=settings.JOBS_STALE_SECONDS),
+                )
+                .values(status="queued")
+            )
+            db.commit()
+
+    def _claim(self, n: int) -> list[int]:
+        with SessionLocal() as db:
+            jobs = db.scalars(
+                select(Job)
+                .where(Job.status == "queued", Job.run_after <= func.now())
+                .order_by(Job.id)
+                .limit(n)
+                .with_for_update(skip_locked=True)
+            ).all()
+            for job in jobs:
+                job.status = "running"
+                job.started_at = func.now()
+                job.attempts = (job.attempts or 0) + 1
+            db.commit()
+            return [j.id for j in jobs]
+
+    def _done(self, fut: Future) -> None:
+        with self._lock:
+            self._inflight.discard(fut)
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                with self._lock:
+                    free = self.workers - len(self._inflight)
+                if free > 0:
+                    for job_id in self._claim(free):
+                        fut = self._executor.submit(_execute_job, job_id)
+                        with self._lock:
+                            self._inflight.add(fut)
+                        fut.add_done_callback(self._done)
+            except Exception:
+                log.exception("Error en el despachador de jobs")
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+
+job_runner = JobRunner(
+    workers=settings.JOBS_WORKERS,
+    mode=settings.JOBS_EXECUTOR,
+    poll_seconds=settings.JOBS_POLL_SECONDS,
+)
+
+
+# ---------- Handlers ----------
+
+@job_handler("rebuild_sales_stats")
+def _rebuild_sales_stats(ctx: JobContext, params: dict[str, Any]) -> dict[str, Any]:
+    from app.services.sales import rebuild_sales_stats
+    return {"products": rebuild_sales_stats(ctx.db, check_cancelled=ctx.check_cancelled)}
+
+
+@job_handler("margin_report")
+def _margin_report(ctx: JobContext, params: dict[str, Any]) -> Any:
+    from app.services.reports import margin_report
+    return margin_report(
+        ctx.db,
+        moneda=params.get("moneda", "BOB"),
+        from_date=date.fromisoformat(params["from_date"]) if params.get("from_date") else None,
+        to_date=date.fromisoformat(params["to_date"]) if params.get("to_date") else None,
+        check_cancelled=ctx.check_cancelled,
+    )
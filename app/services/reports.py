@@ -0,0 +1,118 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Callable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.models.lot import Lot, LotItem
+from app.db.models.product import Product
+from app.db.models.sale import SaleItem
+from app.schemas.report import MarginReportOut, MarginRow
+from app.services.fx import get_rates
+
+_CENT = Decimal("0.01")
+
+
+def margin_report(
+    db: Session,
+    moneda: str = "BOB",
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    check_cancelled: Optional[Callable[[], None]] = None,
+) -> MarginReportOut:
+    """
+    Margen por producto en `moneda`. Los ingresos se agregan en SQL por
+    (producto, día) y se convierten en bloque con la tasa de cada día de venta.
+    El costo es el promedio ponderado de los lotes del producto, llevado a `moneda`
+    con el monto original si el lote se compró en esa moneda y, si no, convirtiendo
+    su costo en BOB a la fecha del lote.
+    """
+    moneda = moneda.upper()
+    # todo sale de sale_items filtrando por su fecha_venta (clave de partición), así el
+    # rango de fechas descarta particiones; unir por sale_id solo no las poda
+    stmt = (
+        select(
+            SaleItem.product_id,
+            SaleItem.fecha_venta,
+            func.sum(SaleItem.cantidad),
+            func.sum(SaleItem.subtotal_bob),
+        )
+        .group_by(SaleItem.product_id, SaleItem.fecha_venta)
+    )
+    if from_date is not None:
+        stmt = stmt.where(SaleItem.fecha_venta >= from_date)
+    if to_date is not None:
+        stmt = stmt.where(SaleItem.fecha_venta <= to_date)
+    ventas = db.execute(stmt).all()
+
+    rates = get_rates(db)
+    ids = sorted({r[0] for r in ventas})
+    costo_prom: dict[int, Decimal] = {}
+    nombres: dict[int, str] = {}
+    if ids:
+        # compras por (producto, fecha del lote, moneda); en BOB costo_unitario_orig es NULL
+        compras = db.execute(
+            select(
+                LotItem.product_id,
+                Lot.fecha,
+                LotItem.moneda,
+                func.sum(LotItem.cantidad),
+                func.sum(LotItem.subtotal_bob),
+                func.sum(func.coalesce(LotItem.costo_unitario_orig, LotItem.costo_unitario_bob) * LotItem.cantidad),
+            )
+            .join(Lot, Lot.id == LotItem.lot_id)
+            .where(LotItem.product_id.in_(ids))
+            .group_by(LotItem.product_id, Lot.fecha, LotItem.moneda)
+        ).all()
+        # lo comprado en otra moneda se convierte desde BOB con la tasa del día del lote
+        ajenas = [c for c in compras if c[2].upper() != moneda]
+        convertidos = iter(rates.convert_many([(f, Decimal(bob)) for _, f, _, _, bob, _ in ajenas], "BOB", moneda))
+        unidades_lote: dict[int, int] = defaultdict(int)
+        costo_lote: dict[int, Decimal] = defaultdict(Decimal)
+        for pid, _, mon, qty, _, orig in compras:
+            unidades_lote[pid] += int(qty)
+            costo_lote[pid] += Decimal(orig) if mon.upper() == moneda else next(convertidos)
+        costo_prom = {pid: costo_lote[pid] / qty for pid, qty in unidades_lote.items() if qty}
+        nombres = dict(db.execute(select(Product.id, Product.nombre).where(Product.id.in_(ids))).all())
+
+    if check_cancelled is not None:
+        check_cancelled()
+
+    # ingresos: un factor por fecha de venta distinta; el costo ya está en `moneda`
+    ingresos = rates.convert_many([(f, Decimal(sub)) for _, f, _, sub in ventas], "BOB", moneda)
+    costos = [(costo_prom.get(pid, Decimal(0)) * Decimal(qty)).quantize(_CENT) for pid, _, qty, _ in ventas]
+
+    acc: dict[int, list] = defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+    for (pid, _, qty, _), ing, cos in zip(ventas, ingresos, costos):
+        a = acc[pid]
+        a[0] += int(qty)
+        a[1] += ing
+        a[2] += cos
+
+    rows = []
+    for pid in ids:
+        unidades, ing, cos = acc[pid]
+        margen = ing - cos
+        rows.append(MarginRow(
+            product_id=pid,
+            nombre=nombres.get(pid),
+            unidades=unidades,
+            ingresos=ing,
+            costo=cos,
+            margen=margen,
+            margen_pct=(margen * 100 / ing).quantize(_CENT) if ing else None,
+        ))
+    rows.sort(key=lambda r: r.margen, reverse=True)
+
+    return MarginReportOut(
+        moneda=moneda,
+        from_date=from_date,
+        to_date=to_date,
+        rows=rows,
+        unidades=sum(r.unidades for r in rows),
+        ingresos=sum((r.ingresos for r in rows), Decimal(0)),
+        costo=sum((r.costo for r in rows), Decimal(0)),
+        margen=sum((r.margen for r in rows), Decimal(0)),
+    )
@@ -0,0 +1,148 @@
+import math
+from datetime import date
+from typing import Callable, Mapping
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.product_stats import ProductSalesStats
+from app.db.models.sale import SaleItem
+
+
+def decay_velocity(velocidad: float, fecha_ref: date, on: date, alpha: float | None = None) -> float:
+    """Lleva una velocidad EWMA válida en `fecha_ref` al día `on` (días sin ventas)."""
+    alpha = settings.REORDER_EWMA_ALPHA if alpha is None else alpha
+    dias = (on - fecha_ref).days
+    if dias <= 0 or not velocidad:
+        return velocidad or 0.0
+    return velocidad * (1.0 - alpha) ** dias
+
+
+def _apply_day(stats: ProductSalesStats, fecha: date, unidades: int, alpha: float) -> None:
+    # EWMA diaria: v_d = alpha * x_d + (1 - alpha) * v_{d-1}; los días sin ventas
+    # solo decaen, así que basta con sumar el aporte de la venta en su día.
+    if fecha >= stats.fecha_ref:
+        stats.velocidad = decay_velocity(stats.velocidad, stats.fecha_ref, fecha, alpha) + alpha * unidades
+        stats.fecha_ref = fecha
+    else:
+        # venta con fecha atrasada: su aporte ya decayó hasta fecha_ref
+        stats.velocidad = (stats.velocidad or 0.0) + alpha * unidades * (1.0 - alpha) ** (stats.fecha_ref - fecha).days
+    stats.unidades_total = (stats.unidades_total or 0) + unidades
+    if stats.ultima_venta is None or fecha > stats.ultima_venta:
+        stats.ultima_venta = fecha
+
+
+def update_sales_stats(db: Session, fecha: date, qty_by_product: Mapping[int, int]) -> None:
+    """
+    Actualiza incrementalmente las estadísticas de los productos vendidos.
+    Se llama dentro de la transacción de la venta (los productos ya están bloqueados).
+    Las filas se leen FOR UPDATE: con eso la venta espera a un rebuild_sales_stats en
+    curso (que bloquea la tabla) en vez de pisar filas que el rebuild borra y recrea.
+    """
+    if not qty_by_product:
+        return
+    alpha = settings.REORDER_EWMA_ALPHA
+    ids = sorted(qty_by_product)
+    existing = {
+        s.product_id: s
+        for s in db.scalars(
+            select(ProductSalesStats).where(ProductSalesStats.product_id.in_(ids)).with_for_update()
+        )
+    }
+    new = []
+    for pid in ids:
+        stats = existing.get(pid)
+        if stats is None:
+            new.append({
+                "product_id": pid,
+                "velocidad": alpha * qty_by_product[pid],
+                "fecha_ref": fecha,
+                "unidades_total": qty_by_product[pid],
+                "ultima_venta": fecha,
+            })
+        else:
+            _apply_day(stats, fecha, qty_by_product[pid], alpha)
+    if new:
+        # si otra transacción insertó la fila entretanto, se combina igual que _apply_day
+        stmt = pg_insert(ProductSalesStats).values(new)
+        t, ex = ProductSalesStats.__table__.c, stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[t.product_id],
+            set_={
+                "velocidad": text(
+                    "CASE WHEN excluded.fecha_ref >= product_sales_stats.fecha_ref "
+                    "THEN product_sales_stats.velocidad * power(1 - :a, excluded.fecha_ref - product_sales_stats.fecha_ref) + excluded.velocidad "
+                    "ELSE product_sales_stats.velocidad + excluded.velocidad * power(1 - :a, product_sales_stats.fecha_ref - excluded.fecha_ref) END"
+                ).bindparams(a=alpha),
+                "fecha_ref": func.greatest(t.fecha_ref, ex.fecha_ref),
+                "unidades_total": t.unidades_total + ex.unidades_total,
+                "ultima_venta": func.greatest(t.ultima_venta, ex.ultima_venta),
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(stmt)
+
+
+def rebuild_sales_stats(db: Session, check_cancelled: Callable[[], None] | None = None) -> int:
+    """
+    Recalcula las estadísticas desde el historial de ventas (carga inicial o reparación).
+    Devuelve la cantidad de productos con estadísticas. `check_cancelled` (jobs) se llama
+    antes del commit y puede lanzar para abortar.
+    """
+    alpha = settings.REORDER_EWMA_ALPHA
+    # unidades por (producto, día) y último día con ventas de cada producto; sale_items ya
+    # lleva fecha_venta (clave de partición): no hace falta unir con sales
+    por_dia = (
+        select(
+            SaleItem.product_id.label("product_id"),
+            SaleItem.fecha_venta.label("fecha"),
+            func.sum(SaleItem.cantidad).label("unidades"),
+        )
+        .group_by(SaleItem.product_id, SaleItem.fecha_venta)
+        .subquery()
+    )
+    dias = select(
+        por_dia,
+        func.max(por_dia.c.fecha).over(partition_by=por_dia.c.product_id).label("fecha_ref"),
+    ).subquery()
+    # aplicar _apply_day día por día deja velocidad = sum(alpha * x_d * (1 - alpha) ** (ref - d))
+    # con ref = último día: se calcula así de una vez en el INSERT ... SELECT
+    velocidad = func.sum(alpha * dias.c.unidades * func.power(1.0 - alpha, dias.c.fecha_ref - dias.c.fecha))
+    calculo = select(
+        dias.c.product_id,
+        velocidad,
+        func.max(dias.c.fecha_ref),
+        func.sum(dias.c.unidades),
+        func.max(dias.c.fecha),
+    ).group_by(dias.c.product_id)
+
+    # EXCLUSIVE deja leer pero frena a las ventas (SELECT ... FOR UPDATE / INSERT) hasta el
+    # commit; tomado antes de leer el historial, ninguna venta queda fuera ni se cuenta dos
+    # veces. Dentro del lock solo corren el DELETE y un INSERT ... SELECT, sin pasar por Python.
+    db.execute(text("LOCK TABLE product_sales_stats IN EXCLUSIVE MODE"))
+    db.execute(delete(ProductSalesStats))
+    result = db.execute(
+        insert(ProductSalesStats)
+        .from_select(["product_id", "velocidad", "fecha_ref", "unidades_total", "ultima_venta"], calculo)
+        .execution_options(preserve_rowcount=True)
+    )
+    if check_cancelled is not None:
+        check_cancelled()
+    db.commit()
+    return result.rowcount
+
+
+def reorder_figures(cantidad: int, velocidad: float) -> tuple[float | None, float, int]:
+    """(días de cobertura, punto de pedido, cantidad sugerida) para un producto."""
+    cantidad = cantidad or 0
+    dias_cobertura = cantidad / velocidad if velocidad > 0 else None
+    punto_pedido = velocidad * (settings.REORDER_LEAD_TIME_DAYS + settings.REORDER_SAFETY_DAYS)
+    sugerido = 0
+    if velocidad > 0 and cantidad <= punto_pedido:
+        objetivo = velocidad * (
+            settings.REORDER_LEAD_TIME_DAYS + settings.REORDER_SAFETY_DAYS + settings.REORDER_COVER_DAYS
+        )
+        sugerido = max(0, math.ceil(objetivo - cantidad))
+    return dias_cobertura, punto_pedido, sugerido
@@ -0,0 +1,17 @@
+from typing import Any, Sequence
+
+from sqlalchemy import Integer, Select, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+def fetch_by_ids(db: Session, stmt: Select, id_col: Any, ids: Sequence[int]) -> tuple[list[Any], list[int]]:
+    """
+    Resuelve muchos ids en una sola consulta (`id = ANY(:ids)`, un único parámetro array
+    aunque sean miles) y devuelve (filas en el orden pedido, ids inexistentes).
+    """
+    wanted = list(dict.fromkeys(ids))
+    rows = db.scalars(
+        stmt.where(id_col == any_(bindparam("batch_ids", wanted, type_=ARRAY(Integer))))
+    ).all()
+    by_id = {r.id: r for r in rows}
+    return [by_id[i] for i in wanted if i in by_id], [i for i in wanted if i not in by_id]
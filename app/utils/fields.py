@@ -0,0 +1,38 @@
+from functools import lru_cache
+from typing import Any, Iterable, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy import inspect
+
+# Sparse fieldsets: ?fields=id,nombre,cantidad limita la respuesta y el SELECT.
+
+def parse_fields(fields: Optional[str], schema: type[BaseModel], always: Iterable[str] = ("id",)) -> Optional[frozenset[str]]:
+    """Valida `fields` contra el schema de salida. None = respuesta completa."""
+    if not fields:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = sorted(requested - set(schema.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Campo(s) desconocido(s) en fields: {unknown}")
+    return frozenset(requested | set(always))
+
+def column_attrs(model: type, fields: Iterable[str]) -> list[Any]:
+    """Atributos columna del modelo ORM que corresponden a `fields` (para load_only)."""
+    cols = inspect(model).column_attrs.keys()
+    return [getattr(model, f) for f in fields if f in cols]
+
+@lru_cache(maxsize=256)
+def partial_schema(schema: type[BaseModel], fields: frozenset[str]) -> type[BaseModel]:
+    """Versión del schema con solo los campos pedidos (cacheada por combinación)."""
+    defs = {f: (schema.model_fields[f].annotation, schema.model_fields[f]) for f in sorted(fields)}
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **defs,
+    )
+
+def dump_fields(schema: type[BaseModel], fields: frozenset[str], objs: Iterable[Any]) -> list[dict[str, Any]]:
+    """Serializa ORM/dicts leyendo solo los atributos pedidos (no dispara cargas perezosas)."""
+    partial = partial_schema(schema, fields)
+    return [partial.model_validate(o).model_dump(mode="json") for o in objs]